@@ -0,0 +1,164 @@
+# Check solvers on random CNFs:
+#   - results and models of every configuration are compared with a brute
+#     force search over all assignments
+#   - text DRAT proofs of unsatisfiable results are checked by reverse unit
+#     propagation (every added clause has to follow by unit propagation)
+#   - incremental calls of CDCL with assumptions (also on variables in no
+#     clause) and clauses added between calls are compared the same way
+# Run with: python Examples/checkSolvers.py [number of CNFs] [seed]
+
+import os
+import sys
+import random
+import tempfile
+import subprocess
+from itertools import product
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOLVER = os.path.join(ROOT, "mysolver.py")
+sys.path.insert(0, ROOT)
+from cdcl import SAT, createInput, CDCL
+# Options of mysolver ... DPLL with and without pure literals and CDCL variants
+CONFIGURATIONS = [["-d"], ["-d", "-l"], [], ["-r"], ["-h"], ["--restart=luby"], ["--restart=glucose", "--phase=target"], ["-m"], ["-s"]]
+# Configurations that write proofs
+PROOFS = [[], ["-s"]]
+
+def randomCNF(rng):
+    '''Number of variables and clauses of a random CNF near the satisfiability threshold.'''
+    numOfVars = rng.randint(3, 12)
+    clauses = []
+    for _ in range(int(numOfVars * rng.uniform(2, 5.5))):
+        w = rng.sample(range(1, numOfVars+1), min(numOfVars, rng.choice((1, 2, 3, 3, 3, 3, 4, 4))))
+        clauses.append([x if rng.random() < 0.5 else -x for x in w])
+    return numOfVars, clauses
+
+def writeCNF(path, numOfVars, clauses):
+    with open(path, "w") as f:
+        f.write(f"p cnf {numOfVars} {len(clauses)}\n")
+        for w in clauses:
+            f.write(" ".join(map(str, w)) + " 0\n")
+
+def bruteForce(numOfVars, clauses):
+    '''True if some assignment satisfies every clause.'''
+    for values in product((False, True), repeat=numOfVars):
+        if all(any(values[abs(l)-1] == (l > 0) for l in w) for w in clauses):
+            return True
+    return False
+
+def readResult(path):
+    '''True and the set of true literals of a satisfiable result, False and None otherwise.'''
+    with open(path) as f:
+        lits = [int(l) for l in f.read().split()]
+    if lits == [0]:
+        return False, None
+    return True, set(lits)
+
+def propagate(clauses, assigned):
+    '''False if unit propagation of clauses from the literals in assigned finds a conflict.'''
+    changed = True
+    while changed:
+        changed = False
+        for w in clauses:
+            free = []
+            for l in w:
+                if l in assigned:
+                    break
+                if -l not in assigned:
+                    free.append(l)
+            else:
+                if not free:
+                    return False
+                if len(free) == 1:
+                    assigned.add(free[0])
+                    changed = True
+    return True
+
+def checkProof(clauses, path):
+    '''True if every clause added by the text DRAT proof has the RUP property and
+    the proof ends with the empty clause.'''
+    clauses = [list(w) for w in clauses]
+    with open(path) as f:
+        for line in f:
+            lits = [int(l) for l in line.split()[1:-1]] if line.startswith("d ") else [int(l) for l in line.split()[:-1]]
+            if line.startswith("d "):
+                # Deleted clauses are matched regardless of the order of literals
+                key = sorted(lits)
+                for i, w in enumerate(clauses):
+                    if sorted(w) == key:
+                        del clauses[i]
+                        break
+                continue
+            # Negation of the clause has to lead to a conflict
+            if propagate(clauses, {-l for l in lits}):
+                return False
+            if not lits:
+                return True
+            clauses.append(lits)
+    return False
+
+def checkIncremental(rng, numOfVars, clauses, calls=6):
+    '''Error messages of incremental calls of CDCL with random assumptions and added clauses.'''
+    errors = []
+    clauses = [list(w) for w in clauses]
+    sat = CDCL(*createInput(numOfVars, clauses), heuristics=True)
+    for n in range(calls):
+        if n and rng.random() < 0.3:
+            # Clauses may also contain new variables
+            w = [x if rng.random() < 0.5 else -x for x in rng.sample(range(1, numOfVars+3), 2)]
+            sat.addClause(w)
+            clauses.append(w)
+        # Assumptions may be on variables that no clause contains
+        assumptions = [x if rng.random() < 0.5 else -x for x in rng.sample(range(1, numOfVars+3), rng.randint(0, 3))]
+        if n == 0:
+            # The first call always assumes a new variable
+            assumptions = [numOfVars+1 if rng.random() < 0.5 else -numOfVars-1]
+        x = sat.solve(assumptions)
+        expected = bruteForce(numOfVars+2, clauses + [[l] for l in assumptions])
+        if (x == SAT) != expected:
+            errors.append(f"call {n} assumptions {assumptions} result {x}")
+        elif x == SAT:
+            model = set(sat.getModel())
+            if not all(any(l in model for l in w) for w in clauses) or not all(l in model for l in assumptions):
+                errors.append(f"call {n} assumptions {assumptions} model does not satisfy the CNF")
+        elif not set(sat.core) <= set(assumptions) or bruteForce(numOfVars+2, clauses + [[l] for l in sat.core]):
+            errors.append(f"call {n} assumptions {assumptions} wrong core {sat.core}")
+    return errors
+
+def run(args, timeout=60):
+    subprocess.run([sys.executable, SOLVER] + args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, cwd=ROOT, timeout=timeout, check=True)
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    rng = random.Random(int(sys.argv[2]) if len(sys.argv) > 2 else 0)
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory:
+        inFile = os.path.join(directory, "in.cnf")
+        outFile = os.path.join(directory, "out.txt")
+        proofFile = os.path.join(directory, "proof.drat")
+        for n in range(count):
+            numOfVars, clauses = randomCNF(rng)
+            writeCNF(inFile, numOfVars, clauses)
+            expected = bruteForce(numOfVars, clauses)
+            for options in CONFIGURATIONS:
+                run([inFile, outFile] + options)
+                sat, model = readResult(outFile)
+                if sat != expected:
+                    print("FAIL", n, " ".join(options) or "cdcl", "result", "SAT" if sat else "UNSAT", "expected", "SAT" if expected else "UNSAT")
+                    failures += 1
+                elif sat and not all(any(l in model for l in w) for w in clauses):
+                    print("FAIL", n, " ".join(options) or "cdcl", "model does not satisfy the CNF")
+                    failures += 1
+            for error in checkIncremental(rng, numOfVars, clauses):
+                print("FAIL", n, "incremental", error)
+                failures += 1
+            if not expected:
+                for options in PROOFS:
+                    run([inFile, outFile, "--proof=" + proofFile, "--textProof"] + options)
+                    if not checkProof(clauses, proofFile):
+                        print("FAIL", n, " ".join(options) or "cdcl", "proof")
+                        failures += 1
+    print("DONE" if failures == 0 else f"{failures} FAILURES")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# Smallest number of colours of a graph with incremental CDCL
+
+import os
+import sys
+from time import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from cdcl import SAT, CDCL
+
+###############################################################
+# COLOURABILITY WITH AT MOST k OF K COLOURS                   #
+#                                                             #
+# x_{i,r} ... i-th node is of colour r | 0<=i<=n-1, 0<=r<=K-1 #
+# u_r ... colour r may be used                                #
+#                                                             #
+# These variables will be represented in DIMACS by:           #
+#   x_{i,r} = i*K + r + 1                                     #
+#   u_r = n*K + r + 1                                         #
+#                                                             #
+# Colours k, ..., K-1 are disabled by assuming -u_r           #
+###############################################################
+
+def readGraph(f):
+    '''Number of nodes and a list of edges of a graph in DIMACS format.'''
+    line = f.readline()
+    while line[0] == "c":
+        line = f.readline()
+    _,_,n,m = line.split()
+    edges = []
+    for _ in range(int(m)):
+        _, i, j = f.readline().split()
+        edges.append((int(i)-1, int(j)-1))
+    return int(n), edges
+
+def createSolver(n, edges, K):
+    sat = CDCL([], {}, heuristics=True)
+    for i in range(n):
+        # Every node has atleast 1 colour
+        sat.addClause([i*K + r + 1 for r in range(K)])
+        for r in range(K):
+            # Every node has atmost 1 colour
+            for s in range(r+1, K):
+                sat.addClause([-(i*K + r + 1), -(i*K + s + 1)])
+            # Colour r is only used if it may be used
+            sat.addClause([-(i*K + r + 1), n*K + r + 1])
+    # Every connected pair must have different colours
+    for i, j in edges:
+        for r in range(K):
+            sat.addClause([-(i*K + r + 1), -(j*K + r + 1)])
+    return sat
+
+def minColours(n, edges, K):
+    '''Smallest number of colours, at most K, and a colouring or None.'''
+    sat = createSolver(n, edges, K)
+    best = None
+    k = K
+    while k > 0:
+        t = time()
+        x = sat.solve([-(n*K + r + 1) for r in range(k, K)])
+        if x == SAT:
+            model = sat.getModel()
+            best = [next(r for r in range(K) if model[i*K + r] > 0) for i in range(n)]
+            used = len(set(best))
+            print(f"{k} colours: SAT with {used} colours used ({sat.conflicts} conflicts in total, {round(time()-t, 2)}s)")
+            k = used - 1
+        else:
+            print(f"{k} colours: UNSAT, {len(sat.core)} assumptions in the core ({sat.conflicts} conflicts in total, {round(time()-t, 2)}s)")
+            break
+    return (len(set(best)), best) if best is not None else (None, None)
+
+def main():
+    # python mincol.py <maximum number of colours> <graph file>
+    K = int(sys.argv[1])
+    with open(sys.argv[2]) as f:
+        n, edges = readGraph(f)
+    k, colouring = minColours(n, edges, K)
+    if k is None:
+        print(f"Graph is not {K}-colourable")
+    else:
+        print(f"Graph is {k}-colourable:", " ".join(map(str, colouring)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+# Logic in computer science
+# Project: Implementing a SAT Solver
+# Batch mode:
+#   - CNFs are given as directories, glob patterns or manifest files
+#     (one path per line, relative to the manifest)
+#   - a pool with one worker process per core solves them, workers stay
+#     alive, so the interpreter is started and modules are imported once
+#   - every result is written to its own output file and/or as a line
+#     of a JSON-lines summary, as soon as it is found
+
+import os
+import sys
+import json
+import glob
+import multiprocessing as mp
+from time import time
+from getopt import gnu_getopt
+import dimacs
+import output
+from budget import Budget
+from cdcl import readInput, CDCL
+from dpll import dpll, createCNF
+from output import SAT, UNSAT, UNKNOWN, writeModel, modelOfLiterals
+
+ERROR = "ERROR" # Solving the file failed
+
+def isDimacs(path):
+    '''True if path is a (possibly compressed) file in DIMACS format.'''
+    if os.path.splitext(path)[1] in dimacs.DECOMPRESS:
+        return True
+    with open(path, "rb") as f:
+        return dimacs.HEADER.search(f.read(1<<12)) is not None
+
+def findInputs(paths):
+    '''Input files of directories, glob patterns and manifest files in paths.'''
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(sorted(os.path.join(root, n) for n in names if isDimacs(os.path.join(root, n))))
+        elif os.path.isfile(path) and not isDimacs(path):
+            # Manifest ... empty lines and lines starting with # are skipped
+            directory = os.path.dirname(path)
+            with open(path) as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith("#"):
+                        files.append(os.path.join(directory, line))
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            files.extend(sorted(glob.glob(path, recursive=True)))
+    return files
+
+def outputPaths(files, outDir):
+    '''Output file of every input file ... the same relative path in outDir.'''
+    if outDir is None:
+        return [None] * len(files)
+    files = [os.path.abspath(f) for f in files]
+    common = os.path.commonpath([os.path.dirname(f) for f in files])
+    return [os.path.join(outDir, os.path.relpath(f, common) + ".out") for f in files]
+
+# Options of every process of the pool
+poolOptions = {}
+
+def initPool(options, competition, cacheDir):
+    global poolOptions
+    poolOptions = options
+    output.competition = competition
+    dimacs.cacheDir = cacheDir
+
+def solveFile(inFile, outFile, useDpll=False, limits=None, **options):
+    '''Dictionary with the result of inFile, the model is written to outFile
+    or added as a list of literals if outFile is None.'''
+    t = time()
+    budget = Budget(**limits) if limits else None
+    result = {"file": inFile}
+    try:
+        if useDpll:
+            cnf, numOfVars = createCNF(inFile)
+            solution = dpll(cnf, numOfVars, budget=budget)
+            x = SAT if solution is not None else UNKNOWN if budget is not None and budget.reason is not None else UNSAT
+            model = modelOfLiterals(numOfVars, solution) if x == SAT else None
+        else:
+            cnf, var = readInput(inFile)
+            sat = CDCL(cnf, var, heuristics=True, **options)
+            sat.budget = budget
+            x = sat.solve()
+            model = [0] + [v.val for v in sat.variables.values()] if x == SAT else None
+            result["conflicts"] = sat.conflicts
+            result["decisions"] = sat.decisions
+    except Exception as e:
+        result.update(result=ERROR, error=repr(e), time=round(time()-t, 4))
+        return result
+    result["result"] = x
+    if x == UNKNOWN:
+        result["reason"] = budget.reason
+    if outFile is not None:
+        os.makedirs(os.path.dirname(outFile) or ".", exist_ok=True)
+        writeModel(outFile, x, model)
+        result["output"] = outFile
+    elif x == SAT:
+        result["model"] = [i if model[i] == 1 else -i for i in range(1, len(model))]
+    result["time"] = round(time()-t, 4)
+    return result
+
+def poolTask(task):
+    return solveFile(*task, **poolOptions)
+
+def solveAll(files, outDir=None, workers=None, options=None):
+    '''Results of all files in the order they are found.'''
+    tasks = list(zip(files, outputPaths(files, outDir)))
+    workers = min(workers or os.cpu_count(), len(tasks)) or 1
+    # Small instances are sent in chunks, so workers rarely wait for the next one
+    chunksize = max(1, min(16, len(tasks) // (4*workers)))
+    with mp.Pool(workers, initPool, (options or {}, output.competition, dimacs.cacheDir)) as pool:
+        yield from pool.imap_unordered(poolTask, tasks, chunksize)
+
+def main():
+    # python batch.py [options] <directories, glob patterns or manifest files>
+    # Options may also follow the paths
+    options, paths = gnu_getopt(sys.argv[1:], "d", ["dpll", "workers=", "outDir=", "summary=", "competition", "noCache", "timeLimit=", "conflictLimit=", "decisionLimit=", "restart=", "phase="])
+
+    # Default values
+    workers = None # Number of worker processes, None means one per core
+    outDir = None # Directory of output files, None means models are in the summary
+    summaryFile = "-" # JSON-lines summary, "-" means the standard output
+    solveOptions = {"useDpll": False, "limits": {}} # Options of solveFile
+
+    for o,v in options:
+        if o == "-d" or o == "--dpll":
+            solveOptions["useDpll"] = True
+        elif o == "--workers":
+            workers = int(v)
+        elif o == "--outDir":
+            outDir = v
+        elif o == "--summary":
+            summaryFile = v
+        elif o == "--competition":
+            output.competition = True
+        elif o == "--noCache":
+            dimacs.cacheDir = None
+        elif o == "--timeLimit":
+            solveOptions["limits"]["timeLimit"] = float(v)
+        elif o in ("--conflictLimit", "--decisionLimit"):
+            solveOptions["limits"][o[2:]] = int(v)
+        elif o in ("--restart", "--phase"):
+            solveOptions[o[2:]] = v
+
+    files = findInputs(paths)
+    if not files:
+        sys.exit("No input files found")
+    summary = sys.stdout if summaryFile == "-" else open(summaryFile, "w")
+    if summaryFile == "-":
+        # The summary is written to the standard output, messages go to the standard error
+        sys.stdout = sys.stderr
+    counts = {}
+    t = time()
+    for result in solveAll(files, outDir, workers, solveOptions):
+        summary.write(json.dumps(result) + "\n")
+        summary.flush()
+        counts[result["result"]] = counts.get(result["result"], 0) + 1
+    if summary is not sys.__stdout__:
+        summary.close()
+    t = time() - t
+    print(f"Solved {len(files)} files in {round(t, 2)}s ({round(len(files)/t, 1) if t > 0 else 0} files/s): "
+          + ", ".join(f"{counts.get(x, 0)} {x}" for x in (SAT, UNSAT, UNKNOWN, ERROR)))
+    sys.exit(1 if counts.get(ERROR) else 0)
+
+if __name__ == "__main__":
+    main()
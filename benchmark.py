@@ -0,0 +1,234 @@
+# Logic in computer science
+# Project: Implementing a SAT Solver
+# Benchmarks and regression checks:
+#   - every CNF under Examples (or the given directories) is solved by
+#     mysolver with every chosen configuration, several times
+#   - every model is checked against the CNF
+#   - wall time, peak memory, conflicts and decisions are written to JSON/CSV
+#   - results can be saved as a baseline and compared with it later
+
+import os
+import sys
+import csv
+import json
+import signal
+import tempfile
+import threading
+import subprocess
+from time import time
+from getopt import getopt
+from statistics import median
+import dimacs
+from output import SAT, UNSAT, readModel, modelOfLiterals, checkModel
+
+# Options of mysolver for every configuration ... the columns of the table in README
+CONFIGURATIONS = {
+    "dpll": ["-d"],
+    "dpll-l": ["-d", "-l"],
+    "cdcl": [],
+    "cdcl-r": ["-r"],
+    "cdcl-luby": ["--restart=luby"],
+    "compact": ["-m"],
+    "simplify": ["-s"],
+}
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SOLVER = os.path.join(ROOT, "mysolver.py")
+TIMEOUT = "TIMEOUT"
+WRONG = "WRONG" # Model does not satisfy the CNF
+ERROR = "ERROR" # Solver crashed
+
+def findCNFs(directories):
+    '''Sorted paths (relative to the repository, so they are the same in every
+    baseline) of all files in DIMACS format in directories.'''
+    files = []
+    for directory in directories:
+        for root, _, names in os.walk(directory):
+            for name in names:
+                path = os.path.join(root, name)
+                with open(path, "rb") as f:
+                    head = f.read(1<<12)
+                if dimacs.HEADER.search(head):
+                    files.append(os.path.relpath(path, ROOT))
+    return sorted(files)
+
+def runSolver(args, timeout, errFile):
+    '''Return code, wall time and peak memory (KB) of mysolver with args, None as return code on timeout.'''
+    t = time()
+    with open(errFile, "w") as err:
+        p = subprocess.Popen([sys.executable, SOLVER] + args, stdout=subprocess.DEVNULL, stderr=err, cwd=ROOT)
+    killed = []
+    def kill():
+        killed.append(True)
+        p.send_signal(signal.SIGKILL)
+    timer = threading.Timer(timeout, kill)
+    timer.start()
+    try:
+        # wait4 reports the peak memory of this process alone
+        _, status, usage = os.wait4(p.pid, 0)
+    finally:
+        timer.cancel()
+    p.returncode = os.waitstatus_to_exitcode(status)
+    return None if killed else p.returncode, time() - t, usage.ru_maxrss
+
+def runOnce(inFile, options, timeout, numOfVars, lits, start):
+    '''Dictionary with the result and measurements of one run.'''
+    with tempfile.TemporaryDirectory() as directory:
+        outFile = os.path.join(directory, "out.txt")
+        statsFile = os.path.join(directory, "stats.json")
+        errFile = os.path.join(directory, "err.txt")
+        code, t, memory = runSolver([inFile, outFile, "--stats=" + statsFile] + options, timeout, errFile)
+        run = {"time": round(t, 3), "memory": memory, "conflicts": None, "decisions": None}
+        if code is None:
+            run["status"] = TIMEOUT
+            return run
+        if code != 0 or not os.path.exists(outFile):
+            run["status"] = ERROR
+            with open(errFile) as f:
+                lines = f.read().strip().split("\n")
+            run["error"] = lines[-1]
+            return run
+        if os.path.exists(statsFile):
+            # Only the CDCL algorithm writes statistics
+            with open(statsFile) as f:
+                stats = json.load(f)
+            run["conflicts"] = stats["conflicts"]
+            run["decisions"] = stats["decisions"]
+        x, model = readModel(outFile)
+    if x == SAT:
+        consistent = len({abs(l) for l in model}) == len(model)
+        x = SAT if consistent and checkModel(lits, start, modelOfLiterals(numOfVars, model)) else WRONG
+    run["status"] = x
+    return run
+
+def benchmark(files, configurations, timeout=60, repeat=1, noCache=False):
+    '''Results of every file with every configuration ... one dictionary per run.'''
+    runs = []
+    for inFile in files:
+        numOfVars, lits, start = dimacs.readDimacs(os.path.join(ROOT, inFile))
+        for name in configurations:
+            for i in range(repeat):
+                run = runOnce(inFile, CONFIGURATIONS[name] + (["--noCache"] if noCache else []), timeout, numOfVars, lits, start)
+                run.update(file=inFile, configuration=name, repeat=i)
+                runs.append(run)
+                print(f"{name:10} {run['status']:12} {run['time']:8.2f}s {run['memory']/1024:8.1f} MB  {inFile}", flush=True)
+                if run["status"] == TIMEOUT:
+                    # Repeating a timeout only takes longer
+                    break
+    return runs
+
+def summarize(runs):
+    '''Median measurements of the runs of every file and configuration.'''
+    groups = {}
+    for run in runs:
+        groups.setdefault(f"{run['file']} {run['configuration']}", []).append(run)
+    summary = {}
+    for key, group in groups.items():
+        statuses = {run["status"] for run in group}
+        summary[key] = {
+            # A single wrong or failed run makes the whole group wrong or failed
+            "status": next((s for s in (WRONG, ERROR, TIMEOUT) if s in statuses), group[0]["status"]),
+            "time": round(median(run["time"] for run in group), 3),
+            "memory": max(run["memory"] for run in group),
+            "conflicts": group[0]["conflicts"],
+            "decisions": group[0]["decisions"],
+        }
+    return summary
+
+def compare(summary, baseline, tolerance=0.2, minTime=0.1):
+    '''Differences from baseline that are regressions.'''
+    regressions = []
+    for key, new in summary.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        if new["status"] != old["status"]:
+            if new["status"] in (WRONG, ERROR) or (new["status"] == TIMEOUT and old["status"] in (SAT, UNSAT)):
+                regressions.append(f"{key}: {old['status']} -> {new['status']}")
+            continue
+        if new["status"] not in (SAT, UNSAT):
+            continue
+        # Times below minTime are mostly the startup of the interpreter
+        if new["time"] > old["time"] * (1+tolerance) and new["time"] - old["time"] > minTime:
+            regressions.append(f"{key}: time {old['time']}s -> {new['time']}s")
+        for m in ("memory", "conflicts", "decisions"):
+            if old[m] is not None and new[m] is not None and new[m] > old[m] * (1+tolerance):
+                regressions.append(f"{key}: {m} {old[m]} -> {new[m]}")
+    return regressions
+
+def writeCSV(runs, outFile):
+    columns = ["file", "configuration", "repeat", "status", "time", "memory", "conflicts", "decisions", "error"]
+    with open(outFile, "w", newline="") as f:
+        writer = csv.DictWriter(f, columns)
+        writer.writeheader()
+        writer.writerows(runs)
+
+def main():
+    # python benchmark.py [options] [directories]
+    options, directories = getopt(sys.argv[1:], "", ["configurations=", "timeout=", "repeat=", "only=", "json=", "csv=", "save=", "baseline=", "tolerance=", "noCache"])
+
+    # Default values
+    configurations = ["cdcl"]
+    timeout = 60 # Seconds before a run is stopped
+    repeat = 1 # Runs of every file with every configuration
+    only = None # Only files whose path contains this
+    jsonFile = None # All runs and the summary
+    csvFile = None # All runs
+    saveFile = None # Summary is saved as a baseline
+    baselineFile = None # Summary is compared with this baseline
+    tolerance = 0.2 # Allowed relative increase of measurements
+    noCache = False # Parse every file in every run instead of loading it from the cache
+
+    for o,v in options:
+        if o == "--configurations":
+            configurations = v.split(",")
+            for name in configurations:
+                if name not in CONFIGURATIONS:
+                    sys.exit(f"Unknown configuration {name}, available: {', '.join(CONFIGURATIONS)}")
+        elif o == "--timeout":
+            timeout = float(v)
+        elif o == "--repeat":
+            repeat = int(v)
+        elif o == "--only":
+            only = v
+        elif o == "--json":
+            jsonFile = v
+        elif o == "--csv":
+            csvFile = v
+        elif o == "--save":
+            saveFile = v
+        elif o == "--baseline":
+            baselineFile = v
+        elif o == "--tolerance":
+            tolerance = float(v)
+        elif o == "--noCache":
+            noCache = True
+            dimacs.cacheDir = None
+
+    files = findCNFs(directories or [os.path.join(os.path.dirname(os.path.abspath(__file__)), "Examples")])
+    if only is not None:
+        files = [f for f in files if only in f]
+    runs = benchmark(files, configurations, timeout, repeat, noCache)
+    summary = summarize(runs)
+    if jsonFile is not None:
+        with open(jsonFile, "w") as f:
+            json.dump({"runs": runs, "summary": summary}, f, indent=1)
+    if csvFile is not None:
+        writeCSV(runs, csvFile)
+    if saveFile is not None:
+        with open(saveFile, "w") as f:
+            json.dump(summary, f, indent=1)
+
+    failed = [key for key, s in summary.items() if s["status"] in (WRONG, ERROR)]
+    for key in failed:
+        print(f"FAILED {key}: {summary[key]['status']}")
+    regressions = []
+    if baselineFile is not None:
+        with open(baselineFile) as f:
+            regressions = compare(summary, json.load(f), tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r}")
+        print(f"{len(regressions)} regressions compared to {baselineFile}")
+    sys.exit(1 if failed or regressions else 0)
+
+if __name__ == "__main__":
+    main()
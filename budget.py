@@ -0,0 +1,79 @@
+# Logic in computer science
+# Project: Implementing a SAT Solver
+# Budgets of a search:
+#   - limits on wall-clock time, conflicts, decisions and memory
+#   - a co-operative interrupt ... interrupt() (from another thread or a
+#     signal handler) or a callback stops the search at the next check
+#   - checks are only made every few conflicts and decisions, so budgets
+#     cost next to nothing
+# A search that runs out of its budget ends with the result UNKNOWN.
+
+import sys
+from time import time
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows ... memory is not limited there
+    resource = None
+
+def memoryUsed():
+    '''Peak memory of this process in MB, None if it can not be measured.'''
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1<<20) if sys.platform == "darwin" else peak / (1<<10)
+
+class Budget:
+    def __init__(self, timeLimit=None, conflictLimit=None, decisionLimit=None, memoryLimit=None, callback=None, interval=100):
+        self.timeLimit = timeLimit # Seconds of every search, None means no limit
+        self.conflictLimit = conflictLimit # Conflicts of every search
+        self.decisionLimit = decisionLimit # Decisions of every search
+        self.memoryLimit = memoryLimit # Peak memory of the process in MB
+        self.callback = callback # Function without arguments, the search stops when it returns True
+        self.interval = interval # Conflicts and decisions between two checks of time, memory and interrupts
+        self.interrupted = False
+        self.reason = None # Why the last search was stopped, None if it was not
+        self.deadline = None
+        self.conflicts = 0 # Conflicts and decisions before the search started
+        self.decisions = 0
+
+    def interrupt(self):
+        '''Stop the search at the next check.'''
+        self.interrupted = True
+
+    def start(self, conflicts=0, decisions=0):
+        '''Start a search that already made conflicts and decisions (incremental calls),
+        return the number of conflicts and decisions at the first check.'''
+        self.interrupted = False
+        self.reason = None
+        self.deadline = time() + self.timeLimit if self.timeLimit is not None else None
+        self.conflicts = conflicts
+        self.decisions = decisions
+        return self.next(conflicts, decisions)
+
+    def next(self, conflicts, decisions):
+        '''Number of conflicts and decisions at the next check.'''
+        n = conflicts + decisions + self.interval
+        # Limits are never passed between two checks, since
+        # conflicts and decisions only grow
+        if self.conflictLimit is not None:
+            n = min(n, decisions + self.conflicts + self.conflictLimit)
+        if self.decisionLimit is not None:
+            n = min(n, conflicts + self.decisions + self.decisionLimit)
+        return n
+
+    def check(self, conflicts, decisions):
+        '''True if the search has to stop ... the reason is saved.'''
+        if self.interrupted or (self.callback is not None and self.callback()):
+            self.reason = "interrupted"
+        elif self.conflictLimit is not None and conflicts - self.conflicts >= self.conflictLimit:
+            self.reason = "conflict limit"
+        elif self.decisionLimit is not None and decisions - self.decisions >= self.decisionLimit:
+            self.reason = "decision limit"
+        elif self.deadline is not None and time() >= self.deadline:
+            self.reason = "time limit"
+        elif self.memoryLimit is not None and (memoryUsed() or 0) >= self.memoryLimit:
+            self.reason = "memory limit"
+        return self.reason is not None
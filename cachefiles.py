@@ -0,0 +1,68 @@
+# Logic in computer science
+# Project: Implementing a SAT Solver
+# Files of the caches (parsed CNFs in dimacs, results in resultcache):
+#   - files are written to a temporary file and renamed, so other
+#     processes never see a partially written file
+#   - the time of a file is updated whenever it is used, and the least
+#     recently used files are deleted when the cache gets too big
+#   - a file deleted by another process is never an error
+
+import os
+from contextlib import contextmanager
+
+@contextmanager
+def atomicWrite(path, mode="w"):
+    '''File opened for writing that replaces path when the block ends.'''
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, mode) as f:
+            yield f
+        os.replace(tmp, path)
+    except BaseException:
+        remove(tmp)
+        raise
+
+def store(path, write, maxSize):
+    '''Write the cache file path with write(path), then delete the least recently
+    used files of its directory (with the same extension) over maxSize bytes.'''
+    directory = os.path.dirname(path)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        write(path)
+        evict(directory, os.path.splitext(path)[1], maxSize)
+    except OSError:
+        # Caching is only an optimization
+        pass
+
+def touch(path):
+    '''Mark path as used now ... the last to be deleted.'''
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+def remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        # Already deleted by another process
+        pass
+
+def evict(directory, suffix, maxSize):
+    '''Delete the least recently used files ending with suffix until those in directory take at most maxSize bytes.'''
+    entries = []
+    size = 0
+    for entry in os.scandir(directory):
+        if entry.name.endswith(suffix):
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, entry.path))
+            size += st.st_size
+    entries.sort()
+    for _, s, path in entries:
+        if size <= maxSize:
+            break
+        remove(path)
+        size -= s
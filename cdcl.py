@@ -3,11 +3,22 @@
 # CDCL with:
 #   - 2WL
 #   - UIP
-#   - heap
+#   - VSIDS heap
 #   - resets
 
 import sys
-from myheap import heapify, decreaseKey
+from time import time
+from collections import Counter
+from itertools import chain
+from random import Random
+from myheap import heapify, decreaseKey, heappush, heappop
+from restarts import createRestart
+from preprocess import Preprocessor
+from dimacs import readDimacs, toClauses, pausedGC
+from output import writeModel, UNKNOWN
+from proof import Proof
+from stats import Stats
+from resultcache import canonicalHash
 
 # CONSTANTS
 SAT = "SATISFIED" # Satisfied
@@ -20,24 +31,40 @@ class Var:
     def __init__(self, i):
         self.i = i
         self.val = 0.5 # unassigned
-        self.a = None # antecedent ... previous in tree
+        self.a = None # antecedent ... a clause, or the other literal of a binary clause
         self.d = -1 # decision level
-        self.watchedP = [] # Clauses in which the variable is watched and is not negated
-        self.watchedN = [] # Clauses in which the negated value of the variable is watched
+        self.watchedP = [] # (clause, blocker) where the variable is watched and is not negated
+        self.watchedN = [] # (clause, blocker) where the negated value of the variable is watched
+        self.impliesP = [] # Literals implied by binary clauses when the variable is True
+        self.impliesN = [] # Literals implied by binary clauses when the variable is False
         self.numId = -1 # Specifies when the variable was added (which in line)
-        self.heapVal = 0
-        self.heapPos = None
+        self.heapVal = 0 # Activity of the variable (VSIDS)
+        self.heapPos = None # Position in the heap, None if not in the heap
         self.heap = None
         self.containedIn = [0, 0] # Contained in clauses as [positive, negated]
+        self.seen = False # Mark used in conflict analysis
+        self.phase = 1 # Value used when the variable is decided (saved phase)
+        self.initialPhase = 1 # Value of the more common literal
+        self.target = None # Value in the longest trail since the last restart
+        self.best = None # Value in the longest trail since the last rephasing
 
     def __repr__(self):
         return f'|{self.i}|'
     
-    def addWatched(self, l, c, pos):
+    def addWatched(self, l, c, blocker):
+        # blocker is another literal of c ... if it is True,
+        # the clause can be skipped without looking at it
         if l<0:
-            self.watchedN.append((c, pos))
+            self.watchedN.append((c, blocker))
         else:
-            self.watchedP.append((c, pos))
+            self.watchedP.append((c, blocker))
+    
+    def addImplied(self, l, implied):
+        # Binary clause (-l, implied) ... if l is True, implied is True
+        if l<0:
+            self.impliesN.append(implied)
+        else:
+            self.impliesP.append(implied)
     
     def updateVariableL(self, l, a, d, numId):
         '''Update variable where input is given as a literal.'''
@@ -53,17 +80,14 @@ class Var:
         self.d = d
         self.numId = numId
     
-    def initHeapVal(self):
-        self.heapVal = max(self.containedIn)
+    def initHeapVal(self, maxContained):
+        # Occurrences are only used to break ties
+        # until the first conflicts are analysed
+        self.heapVal = max(self.containedIn) / (maxContained+1)
     
-    def updateHeapVal(self, l):
-        if l>0:
-            self.containedIn[0] += 1
-        else:
-            self.containedIn[1] += 1
-        newVal = max(self.containedIn)
-        if newVal > self.heapVal:
-            self.heapVal = newVal
+    def bumpActivity(self, inc):
+        self.heapVal += inc
+        if self.heapPos is not None:
             decreaseKey(self.heap, self.heapPos)
 
     def swapValue(self):
@@ -76,139 +100,142 @@ class Var:
         self.numId = -1
 
 class Clause:
-    def __init__(self, w, vs):
+    def __init__(self, w, vs, learnt=False):
         self.vs = vs # Dictionary of variables
-        self.w = w # List of literals
-        self.watched = [None, None]
+        self.w = w # List of literals, w[0] and w[1] are watched
+        self.searchPos = 2 # Where the search for a new watched literal continues
+        self.learnt = learnt # Clause was learned in conflict analysis
+        self.lbd = 0 # Literal block distance ... number of decision levels in the clause when learned
+        self.activity = 0 # Increased every time the clause takes part in conflict analysis
+        self.deleted = False
     
     def __repr__(self):
-        # return f"<{['-'+i[1] if i[0] else i[1] for i in self.w]}, {self.watched}>"
-        return "<" + str(self.w) + ", " + str(self.watched) + ">"
+        return "<" + str(self.w) + ">"
     
     def getValue(self, l):
         return self.vs[l].val if l>0 else 1-self.vs[-l].val
 
-    def initWatched(self):
+    def isLocked(self):
+        '''Clause is the antecedent of its first literal.'''
+        l = self.w[0]
+        x = self.vs[l] if l>0 else self.vs[-l]
+        return x.a is self
+    
+    def watchKey(self, l):
+        # True literals are the best to watch, then unasigned ones
+        # and then False ones with the highest decision level
+        v = self.getValue(l)
+        x = self.vs[l] if l>0 else self.vs[-l]
+        return (2 if v == 1 else 1 if v == 0.5 else 0, x.d)
+
+    def initWatched(self, ordered=False):
         # Initiate 2-watched list
-        for i,l in enumerate(self.w):
-            if self.getValue(l) == 0:
-                # Literal evaluates to False
-                continue
-            else:
-                x = self.vs[l] if l>0 else self.vs[-l]
-                self.watched[0] = l
-                x.addWatched(l, self, 0)
-                break
-        else:
-            # Every literal evaluates to False
-            return UNSAT
-        for j in range(len(self.w)-1, i, -1):
-            l = self.w[j]
-            if self.getValue(l) == 0:
-                # Literal evaluates to False
-                continue
-            else:
-                # Found an unwatched literal that doesn't eval to False
-                x = self.vs[l] if l>0 else self.vs[-l]
-                self.watched[1] = l
-                x.addWatched(l, self, 1)
-                break
-        else:
-            # Didn't find a non-false literal, meaning the
-            # clause is unit ... set the second watched
-            # literal to be any other literal than the
-            # first watched, unless the clause has 1 literal
-            if len(self.w) == 1:
-                # Set both to watch the same literal, but DON'T add it to
-                # the list of watched clauses twice
-                l = self.w[0]
-                self.watched[1] = l
-                return SAT if self.getValue(l) == 1 else UNIT
-            else:
-                # Unit clause with more than 1 literal
-                l = self.w[(i+1)%len(self.w)]
-                x = self.vs[l] if l>0 else self.vs[-l]
-                self.watched[1] = l
-                x.addWatched(l, self, 1)
-                if self.getValue(self.watched[0]) == 1 or self.getValue(l) == 1:
-                    return SAT
-                else:
-                    return UNIT
-        # Found 2 different non-False literals to watch
-        # Check if either of them is True
-        if self.getValue(self.watched[0]) == 1 or self.getValue(self.watched[1]) == 1:
+        # If ordered, w[0] and w[1] already are the best literals to watch
+        w = self.w
+        if len(w) == 0:
+            # Empty clause ... nothing can satisfy it
+            return CONFLICT
+        if len(w) == 1:
+            v = self.getValue(w[0])
+            return SAT if v == 1 else UNIT if v == 0.5 else CONFLICT
+        # Move the two best literals to the front
+        for pos in () if ordered else (0, 1):
+            best = pos
+            for k in range(pos+1, len(w)):
+                if self.watchKey(w[k]) > self.watchKey(w[best]):
+                    best = k
+            w[pos], w[best] = w[best], w[pos]
+        l0, l1 = w[0], w[1]
+        (self.vs[l0] if l0>0 else self.vs[-l0]).addWatched(l0, self, l1)
+        (self.vs[l1] if l1>0 else self.vs[-l1]).addWatched(l1, self, l0)
+        v0, v1 = self.getValue(l0), self.getValue(l1)
+        if v0 == 1 or v1 == 1:
             return SAT
+        elif v0 == 0:
+            # Every literal evaluates to False
+            return CONFLICT
+        elif v1 == 0:
+            # Only w[0] is not False
+            return UNIT
         else:
             return UNRES
-    
-    def updateWatched(self, pos):
-        l1 = self.watched[pos] # The watched literal that is now False
-        l2 = self.watched[1-pos] # The other watched literal
-        l2v = self.getValue(l2)
-        if l2v == 1:
-            # The second watched literal is True
-            # Therefore there is no point in changing
-            # either watched literal
-            return SAT, True
+
+def readClauses(inFile):
+    '''Read a DIMACS file into the number of variables and a list of clauses.'''
+    numOfVars, lits, start = readDimacs(inFile)
+    return numOfVars, toClauses(lits, start)
+
+def createInput(numOfVars, clauses):
+    variables = {i:Var(i) for i in range(1, numOfVars+1)} # create dictionary of variables
+    for l, k in Counter(chain.from_iterable(clauses)).items():
+        if l>0:
+            variables[l].containedIn[0] += k
         else:
-            # Try to find an unwatched literal that is not False
-            for l in self.w:
-                if l == l1 or l == l2:
-                    # Currently watched literal
-                    # OR the other watched literal
-                    continue
-                else:
-                    lv = self.getValue(l)
-                    if lv == 0:
-                        # l is False
-                        continue
-                    else:
-                        # Found a new literal to watch
-                        self.watched[pos] = l
-                        self.vs[l].addWatched(l, self, pos) if l>0 else self.vs[-l].addWatched(l, self, pos)
-                        if lv == 1:
-                            return SAT, False
-                        else:
-                            return UNRES, False
-            if l2v == 0:
-                # All literals in the clause are False
-                return CONFLICT, True
-            else:
-                # Literal 2 is unasigned
-                # Unit clause
-                return UNIT, True
+            variables[-l].containedIn[1] += k
+    with pausedGC():
+        cnf = [Clause(w, variables) for w in clauses]
+    return cnf, variables
 
 def readInput(inFile):
-    with open(inFile) as f:
-        line = f.readline()
-        while line[0] == "c":
-            line = f.readline()
-        _,_,numOfVars,numOfClauses = line.split()
-        variables = {i:Var(i) for i in range(1, int(numOfVars)+1)} # create dictionary of variables
-        cnf = [None] * int(numOfClauses)
-        for i in range(len(cnf)):
-            w = []
-            for l in map(int,f.readline().split()[:-1]):
-                if l>0:
-                    variables[l].containedIn[0] += 1
-                else:
-                    variables[-l].containedIn[1] += 1
-                w.append(l)
-            cnf[i] = Clause(w, variables)
-    return cnf, variables
+    return createInput(*readClauses(inFile))
 
 class CDCL:
-    def __init__(self, cnf, variables, resets=True, resetPoint=100, heuristics=False):
-        self.cnf = cnf # List of all disjunctions
+    def __init__(self, cnf, variables, resets=True, resetPoint=100, heuristics=False, varDecay=0.95,
+                 reduceBase=2000, reduceInc=300, reduceFraction=0.5, keepLbd=2, restart="depth", restartBase=None,
+                 phase="saved", rephaseInterval=0, seed=None, randomFreq=0):
+        self.cnf = [c for c in cnf if len(c.w) != 2] # List of all disjunctions except binary ones
+        self.binaries = [c.w for c in cnf if len(c.w) == 2] # Binary clauses ... kept as implications
         self.variables = variables # Dictionary of all variables
         self.dl = 0 # Decision level
         self.solved = 0 # Variables solved
         self.atLevel = [[]] # Variables solved at each decision level
         self.Q = [] # The queue of variables to still be considered
         self.heap = None
-        self.resetPoint = resetPoint
+        self.varInc = 1 # Activity added to a variable when it takes part in a conflict
+        self.varDecay = varDecay # varInc is divided by varDecay after every conflict
+        self.restart = createRestart(restart, resetPoint, restartBase) # Restart policy
+        self.restarts = 0 # Number of restarts
+
+        # Values of decisions
+        self.phase = phase # "occurrence", "saved" or "target"
+        self.targetSize = 0 # Number of variables solved in the longest trail since the last restart
+        self.bestSize = 0 # Number of variables solved in the longest trail since the last rephasing
+        self.rephaseInterval = rephaseInterval # Conflicts between rephasings, 0 means no rephasing
+        self.nextRephase = rephaseInterval
+        self.rephases = 0 # Number of rephasings
+        self.seed = seed # Seed used to break ties between equally active variables
+        self.random = Random(seed)
+        self.randomFreq = randomFreq # Fraction of decisions made on a random variable
+        self.sharing = None # Exchanges learned clauses with other workers (see sharing)
+        self.proof = None # DRAT proof of learned and deleted clauses, None if not written (see proof)
+        self.assumptions = [] # Literals decided at levels 1, 2, ... before any other decision
+        self.core = [] # Failed assumptions ... assumptions that made the last call unsatisfiable
+        self.initialized = False # initUnitPropagation was already called
+        self.unsat = False # Unsatisfiable without any assumptions
         self.alreadyUsed = set() # Set of already used starting variables
-        self.startNumOfClauses = len(self.cnf) # Used in the end to get the number of conflicts
+        self.startNumOfClauses = len(cnf)
+        self.conflicts = 0 # Number of conflicts found
+        self.decisions = 0 # Number of decisions, without assumptions
+        self.propagations = 0 # Number of variables whose clauses were propagated
+        self.learnedClauses = 0 # Number of learned clauses
+        self.learnedLiterals = 0 # Sum of the lengths of learned clauses
+        self.learnedLbd = 0 # Sum of the lbds of learned clauses
+        self.stats = None # Times of phases and progress lines (see stats), None if not used
+        self.nextProgress = float("inf") # Print a progress line when conflicts reach this number
+        self.budget = None # Limits of every call of solve (see budget), None if there are none
+        self.nextCheck = float("inf") # Check the budget when conflicts + decisions reach this number
+
+        # Learned clauses and their reduction
+        self.learnts = [] # List of learned clauses
+        self.claInc = 1 # Activity added to a learned clause when it takes part in a conflict
+        self.claDecay = 0.999 # claInc is divided by claDecay after every conflict
+        self.reduceBase = reduceBase # Conflicts before the first reduction
+        self.reduceInc = reduceInc # Increase of the number of conflicts between reductions
+        self.reduceInterval = reduceBase # Conflicts between two reductions
+        self.nextReduce = reduceBase # Reduce when conflicts reach this number
+        self.reduceFraction = reduceFraction # Fraction of learned clauses deleted in every reduction
+        self.keepLbd = keepLbd # Learned clauses with lbd <= keepLbd are never deleted
+        self.deletedClauses = 0 # Number of deleted learned clauses
 
         # Choose correct solver
         if resets:
@@ -221,6 +248,52 @@ class CDCL:
         else:
             self.pickBranchingVariable = self.pickBranchingVariableNoHeap
     
+    def addVariables(self, n):
+        # Add variables up to n, they get the lowest activity
+        while len(self.variables) < n:
+            x = Var(len(self.variables)+1)
+            self.variables[x.i] = x
+            if self.initialized:
+                x.heap = self.heap
+                heappush(self.heap, x)
+
+    def addClause(self, w):
+        '''Add clause w (list of literals), also between calls of solve.'''
+        self.addVariables(max(abs(l) for l in w) if w else 0)
+        if not self.initialized:
+            # Clause is initialized with the others in initUnitPropagation
+            if len(w) == 2:
+                self.binaries.append(list(w))
+            else:
+                self.cnf.append(Clause(list(w), self.variables))
+        else:
+            # Remove literals that are False at level 0
+            self.assertLevel(0)
+            wL = []
+            for l in w:
+                x = self.variables[l] if l>0 else self.variables[-l]
+                v = x.val if l>0 else 1-x.val
+                if v == 1 or -l in wL:
+                    # Clause is satisfied or a tautology
+                    return
+                elif v == 0.5 and l not in wL:
+                    wL.append(l)
+            if not wL:
+                self.unsat = True
+                return
+            if len(wL) == 2:
+                self.binaries.append(wL)
+                self.addBinary(wL)
+            else:
+                c = Clause(wL, self.variables)
+                self.cnf.append(c)
+                if c.initWatched(True) == UNIT:
+                    self.setVarValueL(c.w[0], c)
+            w = wL
+        for l in w:
+            x = self.variables[l] if l>0 else self.variables[-l]
+            x.containedIn[0 if l>0 else 1] += 1
+
     def setVarValueL(self, l, c):
         # Set value of literal l in clause c
         # so that it evaluates into True
@@ -258,82 +331,169 @@ class CDCL:
         # Get the pointer to the appropriate watch list
         # If x.val=1, clauses containing (Not x) will evaluate it into False
         # Otherwise clauses containing x will evaluate it into False
-        watched = x.watchedN if x.val == 1 else x.watchedP
-        watchedNew = []
-        for i, (c, pos) in enumerate(watched):
-            # Traverse the clauses that watch the value
-            status, keep = c.updateWatched(pos) # Update the clause
-            if status == CONFLICT:
-                # We found a conflict
-                watched[:i] = watchedNew # Update watched list
-                return True, c
-            elif status == UNIT:
-                # Found a unit clause
-                # Set the value of the variable
-                # in the non-watched position
-                self.setVarValueL(c.watched[1-pos], c)
-
-                # Add element to watchedNew
-                watchedNew.append((c, pos))
-            elif keep:
-                # SAT without changes
-                watchedNew.append((c, pos))
-            else:
-                # SAT or UNRES, both with changes to the watched literal
-                continue
         if x.val == 1:
-            x.watchedN = watchedNew
+            watched = x.watchedN
+            falseLit = -x.i
         else:
-            x.watchedP = watchedNew
+            watched = x.watchedP
+            falseLit = x.i
+        variables = self.variables
+        n = len(watched)
+        i = j = 0 # Watches before j are kept
+        while i < n:
+            e = watched[i]
+            i += 1
+            c, blocker = e
+            y = variables[blocker] if blocker>0 else variables[-blocker]
+            if y.val == (1 if blocker>0 else 0):
+                # Blocker is True ... the clause is satisfied
+                watched[j] = e
+                j += 1
+                continue
+            # Make sure the False literal is w[1]
+            w = c.w
+            if w[0] == falseLit:
+                w[0] = w[1]
+                w[1] = falseLit
+            first = w[0]
+            y = variables[first] if first>0 else variables[-first]
+            firstVal = y.val if first>0 else 1-y.val
+            if firstVal == 1:
+                # The other watched literal is True
+                watched[j] = (c, first)
+                j += 1
+                continue
+            # Try to find an unwatched literal that is not False
+            # Continue where the last search stopped
+            size = len(w)
+            k = c.searchPos
+            for _ in range(size-2):
+                if k >= size:
+                    k = 2
+                l = w[k]
+                y = variables[l] if l>0 else variables[-l]
+                if y.val != (0 if l>0 else 1):
+                    # Found a new literal to watch
+                    w[1] = l
+                    w[k] = falseLit
+                    c.searchPos = k
+                    y.addWatched(l, c, first)
+                    break
+                k += 1
+            else:
+                watched[j] = (c, first)
+                j += 1
+                if firstVal == 0:
+                    # All literals in the clause are False
+                    # Keep the remaining watches
+                    while i < n:
+                        watched[j] = watched[i]
+                        j += 1
+                        i += 1
+                    del watched[j:]
+                    return True, c
+                # Unit clause ... set the value of the first literal
+                self.setVarValueL(first, c)
+        del watched[j:]
         return False, None
 
+    def addBinary(self, w):
+        # Add implications of binary clause w
+        l0, l1 = w
+        x = self.variables[l0] if l0>0 else self.variables[-l0]
+        x.addImplied(-l0, l1)
+        x = self.variables[l1] if l1>0 else self.variables[-l1]
+        x.addImplied(-l1, l0)
+
     def initUnitPropagation(self):
         # Initial propagation, when the queue is empty
+        # Binary clauses are propagated once the queue is processed
+        for w in self.binaries:
+            self.addBinary(w)
         # Check if there are any unit clauses
+        conflict = False
         for c in self.cnf:
             status = c.initWatched()
             if status == CONFLICT:
                 # Conflict before any decisions were made
-                # Problem is unsatisfiable
-                return True
+                # Problem is unsatisfiable ... the heap is still built,
+                # so variables added by later calls can be pushed into it
+                conflict = True
+                break
             elif status == UNIT:
                 # Unit clause
-                # Set the value of the watched literal
+                # Set the value of the first literal
                 # so that it evaluates into True
-                l = c.watched[0]
-                self.setVarValueL(l, c)
+                self.setVarValueL(c.w[0], c)
             else:
                 # Clause is unresolved ... nothing to do
                 continue
-        if self.solved < len(self.variables):
-            # Problem is not solved yet ... init heapq
-            self.heap = [None] * (len(self.variables) - self.solved)
-            i = 0
-            for x in self.variables.values():
-                if x.val != 0.5:
-                    continue
-                self.heap[i] = x
-                x.heap = self.heap
-                x.heapPos = i
-                x.initHeapVal()
-                i += 1
-            heapify(self.heap)
-        return False
+        for x in self.variables.values():
+            x.initialPhase = 0 if x.containedIn[1] > x.containedIn[0] else 1
+            x.phase = x.initialPhase
+        # Init heapq ... also when the problem is solved, so variables
+        # can be pushed into it by later calls of solve
+        self.heap = [None] * (len(self.variables) - self.solved)
+        maxContained = max((max(x.containedIn) for x in self.variables.values()), default=0)
+        i = 0
+        for x in self.variables.values():
+            if x.val != 0.5:
+                continue
+            self.heap[i] = x
+            x.heap = self.heap
+            x.heapPos = i
+            x.initHeapVal(maxContained)
+            if self.seed is not None:
+                # Different seeds break ties differently
+                x.heapVal += self.random.random() / (maxContained+1)
+            i += 1
+        heapify(self.heap)
+        return conflict
+    
+    def updateImplied(self, x):
+        # Set the values of literals implied by binary clauses
+        if x.val == 1:
+            implied = x.impliesP
+            falseLit = -x.i
+        else:
+            implied = x.impliesN
+            falseLit = x.i
+        variables = self.variables
+        for l in implied:
+            y = variables[l] if l>0 else variables[-l]
+            if y.val == 0.5:
+                # The antecedent is the other (False) literal
+                self.setVarValueL(l, falseLit)
+            elif y.val != (1 if l>0 else 0):
+                # Both literals of the clause are False
+                return True, [l, falseLit]
+        return False, None
     
     def unitPropagation(self):
         # Propagate while 'Q' is not empty
-        i = 0
-        while i < len(self.Q):
-            x = self.Q[i]
-            status, c = self.updateWatched(x)
+        # Binary clauses of every variable in 'Q' are propagated
+        # before the next variable's longer clauses
+        i = 0 # Next variable for longer clauses
+        iB = 0 # Next variable for binary clauses
+        Q = self.Q
+        while i < len(Q):
+            while iB < len(Q):
+                status, c = self.updateImplied(Q[iB])
+                if status:
+                    break
+                iB += 1
+            else:
+                status, c = self.updateWatched(Q[i])
+                i += 1
             if status:
                 # Found a conflict
                 # Clear the queue
                 # Report the clause
                 self.Q = []
+                self.propagations += i
                 return True, c
-            i += 1
         self.Q = []
+        self.propagations += i
         return False, None
     
     def pickBranchingVariableNoHeap(self):
@@ -346,128 +506,452 @@ class CDCL:
         return None, -1
 
     def pickBranchingVariableHeap(self):
-        '''Pick an unasigned variable.'''
-        for x in self.heap:
+        '''Pick an unasigned variable with the highest activity.'''
+        if self.randomFreq and self.heap and self.random.random() < self.randomFreq:
+            # Random decision ... the variable stays in the heap
+            # and is skipped once it is popped while assigned
+            x = self.heap[self.random.randrange(len(self.heap))]
             if x.val == 0.5:
-                if x.containedIn[1] > x.containedIn[0]:
-                    return x, 0
-                else:
-                    return x, 1
+                return x, self.pickPhase(x)
+        while self.heap:
+            x = heappop(self.heap)
+            if x.val == 0.5:
+                return x, self.pickPhase(x)
         return None, -1
-    
-    def containsLevelD(self, w, d):
-        '''Returns literal if w contains literals
-        of decision level d with literal.a != None.'''
-        for l in w:
-            x = l[1]
-            if x.d == d and x.a is not None:
-                return x
-        return None
-    
-    def resolution(self, w1, w2, x):
-        # TODO - premisli, ce res vedno tako?
-        wNew = []
-        seen = {x.i, -x.i}
-        for l in w1:
-            if l not in seen:
-                wNew.append(l)
-                seen.add(l)
-        for l in w2:
-            if l not in seen:
-                wNew.append(l)
-                seen.add(l)
-        return wNew
-    
-    def chooseNextVar(self, w):
-        maxx = None
-        maxv = -2
-        counter = 0
-        for l in w:
-            x = self.variables[l] if l>0 else self.variables[-l]
-            if x.d == self.dl:
-                counter += 1
-                if x.numId > maxv:
-                    maxv = x.numId
-                    maxx = x
-        if counter <= 1:
-            return None
+
+    def pickPhase(self, x):
+        '''Value of a decision on x.'''
+        if self.phase == "occurrence":
+            return 0 if x.containedIn[1] > x.containedIn[0] else 1
+        elif self.phase == "target" and x.target is not None:
+            return x.target
         else:
-            return maxx
+            return x.phase
+    
+    def rescaleActivity(self):
+        # Scale all activities down to avoid overflow
+        for x in self.variables.values():
+            x.heapVal *= 1e-100
+        self.varInc *= 1e-100
     
+    def unassign(self, x):
+        x.phase = x.val # Save the phase
+        x.reset()
+        self.solved -= 1
+        if x.heap is not None and x.heapPos is None:
+            # Variable can be picked again
+            heappush(self.heap, x)
+    
+    def getModel(self):
+        '''Literals of the model found by the last call of solve.'''
+        return [x.i if x.val == 1 else -x.i for x in self.variables.values()]
+
     def getLevel(self, w):
+        '''Highest level of w[1:], the literal with that level is moved to w[1].'''
         if len(w) == 1:
             return 0
         else:
-            max1 = -1
-            max2 = -1
-            for l in w:
+            m = 1
+            maxd = -1
+            for k in range(1, len(w)):
+                l = w[k]
                 x = self.variables[l] if l>0 else self.variables[-l]
-                if x.d > max1:
-                    max1, max2 = x.d, max1
-                elif x.d > max2:
-                    max2 = x.d
-            return max2
-    
-    def conflictAnalysis(self, w):
-        wL = [i for i in w]
-        x = self.chooseNextVar(wL)
-        while x:
-            wL = self.resolution(wL, x.a.w, x)
-            x = self.chooseNextVar(wL)
+                if x.d > maxd:
+                    m, maxd = k, x.d
+            w[1], w[m] = w[m], w[1]
+            return maxd
+    
+    def computeLbd(self, w):
+        '''Number of different decision levels in w.'''
+        return len({(self.variables[l] if l>0 else self.variables[-l]).d for l in w})
+    
+    def bumpClauseActivity(self, c):
+        c.activity += self.claInc
+        if c.activity > 1e20:
+            # Scale all clause activities down to avoid overflow
+            for c in self.learnts:
+                c.activity *= 1e-20
+            self.claInc *= 1e-20
+    
+    def conflictAnalysis(self, c):
+        '''First UIP clause of the conflict in c and its assertion level.'''
+        variables = self.variables
+        trail = self.atLevel[self.dl] # Variables of the current level in order of assignment
+        idx = len(trail) - 1
+        wL = [None] # wL[0] is reserved for the UIP
+        counter = 0 # Marked variables of the current level that are not resolved yet
+        x = None # Variable that is resolved
+        while True:
+            if c.__class__ is Clause:
+                if c.learnt:
+                    self.bumpClauseActivity(c)
+                w = c.w
+            elif c.__class__ is int:
+                # Binary antecedent
+                w = (c,)
+            else:
+                # Conflict in a binary clause
+                w = c
+            for l in w:
+                y = variables[l] if l>0 else variables[-l]
+                if y.seen or y is x or y.d == 0:
+                    # Already in the clause, the resolved variable
+                    # or a variable that is False regardless of decisions
+                    continue
+                y.seen = True
+                if self.heuristics:
+                    y.bumpActivity(self.varInc)
+                    if y.heapVal > 1e100:
+                        self.rescaleActivity()
+                if y.d == self.dl:
+                    counter += 1
+                else:
+                    wL.append(l)
+            # Walk the trail back to the next marked variable
+            while not trail[idx].seen:
+                idx -= 1
+            x = trail[idx]
+            idx -= 1
+            x.seen = False
+            counter -= 1
+            if counter == 0:
+                # x is the first UIP
+                break
+            c = x.a
+        wL[0] = -x.i if x.val == 1 else x.i
+
+        # Remove literals implied by the other literals of wL
+        toClear = [variables[l] if l>0 else variables[-l] for l in wL[1:]]
+        abstractLevels = 0
+        for y in toClear:
+            abstractLevels |= 1 << (y.d & 31)
+        j = 1
+        for i in range(1, len(wL)):
+            y = toClear[i-1]
+            if y.a is None or not self.litRedundant(y, abstractLevels, toClear):
+                wL[j] = wL[i]
+                j += 1
+        del wL[j:]
+        for y in toClear:
+            y.seen = False
+
+        # Decay activities by increasing the bump
+        self.varInc /= self.varDecay
+        self.claInc /= self.claDecay
         return wL, self.getLevel(wL)
     
+    def litRedundant(self, x, abstractLevels, toClear):
+        '''Variable x is implied by the marked variables.'''
+        variables = self.variables
+        stack = [x]
+        top = len(toClear)
+        while stack:
+            y = stack.pop()
+            for l in (y.a.w if y.a.__class__ is Clause else (y.a,)):
+                z = variables[l] if l>0 else variables[-l]
+                if z is y or z.seen or z.d == 0:
+                    continue
+                if z.a is not None and (1 << (z.d & 31)) & abstractLevels:
+                    # z may still be implied by the marked variables
+                    z.seen = True
+                    stack.append(z)
+                    toClear.append(z)
+                else:
+                    # Reached a decision or a level that is not in the clause
+                    for z in toClear[top:]:
+                        z.seen = False
+                    del toClear[top:]
+                    return False
+        return True
+    
+    def reduceLearnts(self):
+        # Delete the worst learned clauses ... those with the highest lbd
+        # and lowest activity, unless they are antecedents of a variable
+        candidates = [c for c in self.learnts if c.lbd > self.keepLbd and not c.isLocked()]
+        candidates.sort(key=lambda c: (-c.lbd, c.activity))
+        candidates = candidates[:int(len(candidates) * self.reduceFraction)]
+        if not candidates:
+            return
+        touched = set()
+        for c in candidates:
+            c.deleted = True
+            if self.proof is not None:
+                self.proof.delete(c.w)
+            for l in c.w[:2]:
+                touched.add(self.variables[l] if l>0 else self.variables[-l])
+        # Remove deleted clauses from watched lists
+        for x in touched:
+            x.watchedP = [(c, b) for c, b in x.watchedP if not c.deleted]
+            x.watchedN = [(c, b) for c, b in x.watchedN if not c.deleted]
+        self.learnts = [c for c in self.learnts if not c.deleted]
+        self.deletedClauses += len(candidates)
+    
     def assertLevel(self, beta):
         for d in range(self.dl, beta, -1):
             for x in self.atLevel[d]:
-                x.reset()
-                self.solved -= 1
+                self.unassign(x)
             del self.atLevel[d]
         self.dl = beta
     
     def backtrack(self, beta):
         for d in range(self.dl, beta-1, -1):
             for x in self.atLevel[d]:
-                x.reset()
-                self.solved -= 1
+                self.unassign(x)
             del self.atLevel[d]
     
+    def savePhases(self, target):
+        # Remember the current trail as the target or the best phases
+        for level in self.atLevel:
+            for x in level:
+                if target:
+                    x.target = x.val
+                else:
+                    x.best = x.val
+    
+    def rephase(self):
+        # Reset saved phases to best, original, best and inverted phases in turn
+        kind = self.rephases % 4
+        for x in self.variables.values():
+            if kind == 0 or kind == 2:
+                if x.best is not None:
+                    x.phase = x.best
+            elif kind == 1:
+                x.phase = x.initialPhase
+            else:
+                x.phase = 1 - x.initialPhase
+            x.target = None
+        self.targetSize = 0
+        self.bestSize = 0
+        self.rephases += 1
+        self.nextRephase += self.rephaseInterval * (self.rephases+1)
+    
+    def restartLevel(self):
+        '''Highest level that would be decided the same way after a restart.'''
+        if not self.heuristics:
+            return 0
+        heap = self.heap
+        while heap and heap[0].val != 0.5:
+            heappop(heap)
+        if not heap:
+            return self.dl
+        # Keep assumptions and decisions whose variables are more active than the next decision
+        act = heap[0].heapVal
+        level = min(self.dl, len(self.assumptions))
+        while level < self.dl and self.atLevel[level+1][0].heapVal > act:
+            level += 1
+        return level
+    
     def reset(self):
+        # Restart by backtracking to the level where the trail would differ
         self.dl -= 1
-        self.assertLevel(0)
-        self.resetPoint *= 1.1
+        self.assertLevel(self.restartLevel())
+        self.restart.onRestart()
+        self.restarts += 1
+        self.targetSize = 0
     
+    def assume(self):
+        '''Decide the next assumption, False if it is already False.'''
+        l = self.assumptions[self.dl]
+        x = self.variables[l] if l>0 else self.variables[-l]
+        v = x.val if l>0 else 1-x.val
+        if v == 0:
+            return False
+        self.dl += 1
+        self.atLevel.append([])
+        if v == 0.5:
+            self.setVarValueL(l, None)
+        # Else the level stays empty ... assumption is already True
+        return True
+
     def makeDecisionNoReset(self):
         self.dl += 1
         self.atLevel.append([])
         x, v = self.pickBranchingVariable()
         self.setVarValueV(x, v, None)
+        self.decisions += 1
         return False
     
     def makeDecisionReset(self):
         self.dl += 1
-        if self.dl > self.resetPoint:
+        if self.restart.shouldRestart(self.dl):
             self.reset()
             return True
         self.atLevel.append([])
         x, v = self.pickBranchingVariable()
         self.setVarValueV(x, v, None)
+        self.decisions += 1
         return False
     
-    def solve(self):
-        '''Solve without resets.'''
-        if self.initUnitPropagation():
-            # There was a conflict before any decisions were made
+    def addLearnedClause(self, wL, lbd):
+        '''Add learned clause wL, False if it is a conflict.'''
+        if len(wL) == 2:
+            # Binary clause ... add its implications
+            # If wL[1] is False, wL[0] is implied
+            self.binaries.append(wL)
+            self.addBinary(wL)
+            x = self.variables[wL[1]] if wL[1]>0 else self.variables[-wL[1]]
+            if x.val != 0.5:
+                self.setVarValueL(wL[0], wL[1])
+        else:
+            # Add wL to learned clauses and initialize it
+            c = Clause(wL, self.variables, True)
+            c.lbd = lbd
+            self.bumpClauseActivity(c)
+            self.learnts.append(c)
+            status = c.initWatched(True)
+            if status == CONFLICT:
+                # Usually means that there is only 1 literal in it
+                # and its variable has already been asigned in a way
+                # that evaluates the literal to False
+                return False
+            elif status == UNIT:
+                # Added a unit clause ... propagate the appropriate variable
+                self.setVarValueL(c.w[0], c)
+
+        # Update occurrences used to choose the value of a decision
+        for l in wL:
+            x = self.variables[l] if l>0 else self.variables[-l]
+            x.containedIn[0 if l>0 else 1] += 1
+        return True
+
+    def importClauses(self):
+        '''Add clauses learned by other workers at level 0, False if one of them is a conflict.'''
+        clauses = self.sharing.exchange()
+        if not clauses:
+            return True
+        self.assertLevel(0)
+        for w in clauses:
+            # Remove literals that are False at level 0
+            wL = []
+            for l in w:
+                x = self.variables[l] if l>0 else self.variables[-l]
+                v = x.val if l>0 else 1-x.val
+                if v == 1:
+                    # Clause is already satisfied
+                    break
+                elif v == 0.5:
+                    wL.append(l)
+            else:
+                if not wL or not self.addLearnedClause(wL, len(wL)):
+                    return False
+        return True
+
+    def analyzeFinal(self, l):
+        '''Assumptions that imply that assumption l is False (including l).'''
+        core = [l]
+        x = self.variables[l] if l>0 else self.variables[-l]
+        if x.d == 0:
+            # l is False without any assumptions
+            return core
+        x.seen = True
+        for d in range(self.dl, 0, -1):
+            for y in reversed(self.atLevel[d]):
+                if not y.seen:
+                    continue
+                y.seen = False
+                if y.a is None:
+                    # Decided assumption
+                    core.append(y.i if y.val == 1 else -y.i)
+                else:
+                    for k in [y.a] if isinstance(y.a, int) else y.a.w:
+                        z = self.variables[k] if k>0 else self.variables[-k]
+                        if z is not y and z.d > 0:
+                            z.seen = True
+        return core
+
+    def solve(self, assumptions=()):
+        '''Solve, with the literals in assumptions set to True.
+        Can be called again after adding clauses, learned clauses are kept.'''
+        self.assumptions = list(assumptions)
+        if self.assumptions:
+            # Assumptions may be on variables that no clause contains yet
+            self.addVariables(max(abs(l) for l in self.assumptions))
+        self.core = []
+        if self.unsat:
             return UNSAT
-        while self.solved < len(self.variables):
+        stats = self.stats
+        if stats is not None and stats.interval:
+            self.nextProgress = self.conflicts + stats.interval
+        self.nextCheck = self.budget.start(self.conflicts, self.decisions) if self.budget is not None else float("inf")
+        t = time()
+        if not self.initialized:
+            self.initialized = True
+            status = self.initUnitPropagation()
+            if stats is not None:
+                stats.addTime("initial propagation", time() - t)
+                t = time()
+            if status:
+                # There was a conflict before any decisions were made
+                self.unsat = True
+                if self.proof is not None:
+                    self.proof.add([])
+                return UNSAT
+        else:
+            # Continue from level 0 of the last call
+            self.assertLevel(0)
+        x = self.search()
+        if stats is not None:
+            stats.addTime("search", time() - t)
+        if x == UNSAT and not self.core:
+            # Unsatisfiable without any assumptions
+            self.unsat = True
+            if self.proof is not None:
+                # Propagating the learned clauses leads to a conflict
+                self.proof.add([])
+        return x
+
+    def search(self):
+        '''Search for a model under the assumptions.'''
+        while self.solved < len(self.variables) or self.Q or self.dl < len(self.assumptions):
+            if self.conflicts + self.decisions >= self.nextCheck and len(self.Q) == 0:
+                # Budget is only checked every few conflicts and decisions, before a decision,
+                # so the next call continues from level 0 without anything to propagate
+                if self.budget.check(self.conflicts, self.decisions):
+                    return UNKNOWN
+                self.nextCheck = self.budget.next(self.conflicts, self.decisions)
+            if len(self.Q) == 0 and self.dl < len(self.assumptions):
+                # Assumptions are decided before any other variable
+                if not self.assume():
+                    # Assumption is False ... unsatisfiable under assumptions
+                    self.core = self.analyzeFinal(self.assumptions[self.dl])
+                    return UNSAT
+                continue
             if len(self.Q) == 0 and self.makeDecision():
                 # The queue is empty ... we made a decision
-                # Decision level exceeded resetPoint
+                # Restart policy decided to restart
                 # We reset the values and start again
+                if self.sharing is not None and not self.importClauses():
+                    # Other workers learned a conflicting clause
+                    return UNSAT
                 continue
             status, c = self.unitPropagation()
             if status:
                 # Found a conflict: conflict analysis
-                wL, beta = self.conflictAnalysis(c.w)
+                self.conflicts += 1
+                if self.dl == 0:
+                    # Conflict before any decisions were made
+                    return UNSAT
+                if self.phase == "target" and self.solved > self.targetSize:
+                    # Longest trail since the last restart
+                    self.targetSize = self.solved
+                    self.savePhases(True)
+                if self.rephaseInterval and self.solved > self.bestSize:
+                    # Longest trail since the last rephasing
+                    self.bestSize = self.solved
+                    self.savePhases(False)
+                wL, beta = self.conflictAnalysis(c)
+                lbd = self.computeLbd(wL)
+                self.restart.onConflict(lbd)
+                self.learnedClauses += 1
+                self.learnedLiterals += len(wL)
+                self.learnedLbd += lbd
+                if self.conflicts >= self.nextProgress:
+                    self.stats.progress(self)
+                    self.nextProgress += self.stats.interval
+                if self.proof is not None:
+                    self.proof.add(wL)
+                if self.sharing is not None:
+                    self.sharing.export(wL, lbd)
                 if beta < 0:
                     # All variables in wL are unasigned or were propagated
                     # before any decisions were made, adding wL to
@@ -477,47 +961,109 @@ class CDCL:
                     # At level beta, wL is a unit clause
                     self.assertLevel(beta)
 
-                    # Add wL to cnf and initialize it
-                    c = Clause(wL, self.variables)
-                    self.cnf.append(c)
-                    status = c.initWatched()
-                    if status == CONFLICT:
-                        # This should never happen
-                        return UNSAT
-                    elif status == UNIT:
-                        # Added a unit clause ... propagate the appropriate variable
-                        self.setVarValueL(c.watched[0], c)
-
-                        if self.heuristics:
-                            # Update heap and priority values
-                            for l in wL:
-                                x = self.variables[l] if l>0 else self.variables[-l]
-                                if x.heap:
-                                    x.updateHeapVal(l)
-                    elif status == UNSAT:
+                    if not self.addLearnedClause(wL, lbd):
                         # Clause is not satisfiable
-                        # Usually means that there is only 1 literal in it
-                        # and its variable has already been asigned in a way
-                        # that evaluates the literal to False
                         return UNSAT
-                    else:
-                        # This should never happen
-                        print("wL is NOT unit!")
-                        continue
+
+                    if self.rephaseInterval and self.conflicts >= self.nextRephase:
+                        self.rephase()
+
+                    if self.conflicts >= self.nextReduce:
+                        # Periodically delete the worst learned clauses
+                        self.reduceLearnts()
+                        self.reduceInterval += self.reduceInc
+                        self.nextReduce += self.reduceInterval
         return SAT
 
-def solve(inFile, outFile, resets=True, resetPoint=100, heuristics=True, conflicts=False):
-    cnf, var = readInput(inFile)
-    sat = CDCL(cnf, var, resets, resetPoint, heuristics)
-    x = sat.solve()
-    if conflicts:
-        print(f"{len(sat.cnf)-sat.startNumOfClauses} conflicts")
+def solve(inFile, outFile, resets=True, resetPoint=100, heuristics=True, conflicts=False, compact=False, simplify=False,
+          proofFile=None, binaryProof=True, statsFile=None, progress=0, budget=None, resultCache=None, **options):
+    # Proofs and statistics are written by the object engine and the preprocessor
+    proof = Proof(proofFile, binaryProof) if proofFile is not None and not compact else None
+    stats = Stats(progress) if (statsFile is not None or progress) and not compact else None
+    t = time()
+    clauses = None # Clauses of the CNF if it was already read
+    if resultCache is not None:
+        # The same CNF (in any order) may have been solved before
+        numOfVars, lits, start = readDimacs(inFile)
+        key = canonicalHash(numOfVars, lits, start)
+        cached = resultCache.get(key, numOfVars, lits, start)
+        if cached is not None and not (cached[0] == UNSAT and proof is not None):
+            # Cached unsatisfiable results have no proof
+            x, model = cached
+            print(f"Result found in the cache in {round(time()-t, 2)}s.")
+            print(x)
+            if proof is not None:
+                proof.close()
+            writeModel(outFile, x, model)
+            if statsFile is not None:
+                stats.addTime("cache", time() - t)
+                stats.writeCached(numOfVars, statsFile)
+            return
+        clauses = toClauses(lits, start)
+        if stats is not None:
+            stats.addTime("parse", time() - t)
+    if simplify:
+        # Simplify the CNF before solving
+        if clauses is None:
+            numOfVars, clauses = readClauses(inFile)
+            if stats is not None:
+                stats.addTime("parse", time() - t)
+        pre = Preprocessor(numOfVars, clauses, proof=proof)
+        clauses = pre.run()
+        if stats is not None:
+            stats.addTime("preprocess", pre.time)
+        print(f"Preprocessing removed {pre.removedClauses()} clauses and {pre.removedVariables()} variables in {round(pre.time, 2)}s.")
+        if clauses is None:
+            print(UNSAT)
+            if proof is not None:
+                proof.add([])
+                proof.close()
+            writeModel(outFile, UNSAT, None)
+            if resultCache is not None:
+                resultCache.put(key, UNSAT, None)
+            return
+        # Eliminated and fixed variables are not decided
+        numOfVars, clauses = pre.renumber(clauses)
+    if compact:
+        # Flat array engine
+        from cdclarray import readInputArray, createInputArray, CDCLArray
+        sat = CDCLArray(*(createInputArray(numOfVars, clauses) if clauses is not None else readInputArray(inFile)), resets, resetPoint, heuristics)
+        x = sat.solve()
+        if conflicts:
+            print(f"{sat.numOfClauses-sat.startNumOfClauses} conflicts")
+        model = [0] + [1 if l>0 else 0 for l in sat.getModel()] if x == SAT else None
+    else:
+        t = time()
+        cnf, var = createInput(numOfVars, clauses) if clauses is not None else readInput(inFile)
+        if stats is not None:
+            stats.addTime("parse", time() - t)
+        sat = CDCL(cnf, var, resets, resetPoint, heuristics, **options)
+        sat.proof = proof
+        sat.stats = stats
+        sat.budget = budget
+        t = time()
+        x = sat.solve()
+        t = time() - t
+        if proof is not None:
+            proof.close()
+            if x == UNSAT:
+                print(f"Proof with {proof.added} added and {proof.deleted} deleted clauses written to {proofFile}.")
+        if conflicts:
+            print(f"{sat.conflicts} conflicts ({round(sat.conflicts/t) if t > 0 else 0} conflicts/s), {sat.deletedClauses} learned clauses deleted, {sat.restarts} restarts, {sat.rephases} rephases")
+        model = [0] + [v.val for v in sat.variables.values()] if x == SAT else None
     print(x)
-    with open(outFile, "w") as f:
-        if x == UNSAT:
-            f.write("0")
-        else:
-            f.write(" ".join(map(str, [i.i if i.val == 1 else -i.i for i in sat.variables.values()])))
+    if x == UNKNOWN:
+        print(f"Stopped by the {budget.reason}.")
+    t = time()
+    if simplify and x == SAT:
+        model = pre.extendModel(model)
+    writeModel(outFile, x, model)
+    if resultCache is not None:
+        resultCache.put(key, x, model)
+    if stats is not None:
+        stats.addTime("output", time() - t)
+        if statsFile is not None:
+            stats.write(sat, statsFile)
 
 def main():
     solve(sys.argv[1], sys.argv[2])
@@ -0,0 +1,300 @@
+# Logic in computer science
+# Project: Implementing a SAT Solver
+# Compact CDCL with flat arrays:
+#   - literal i is coded as 2*i and literal -i as 2*i+1
+#   - values, levels, antecedents and the trail live in arrays
+#   - literals of all clauses live in a single array with offsets
+#   - 2WL, UIP, heuristics and resets as in cdcl
+
+from array import array
+from cdcl import SAT, UNSAT
+from dimacs import readDimacs
+
+def toCode(l):
+    '''Literal -> literal code.'''
+    return 2*l if l>0 else 1-2*l
+
+def toLiteral(c):
+    '''Literal code -> literal.'''
+    return -(c>>1) if c&1 else c>>1
+
+def readInputArray(inFile):
+    '''Read a DIMACS file into a flat array of literal codes and clause offsets.'''
+    numOfVars, lits, start = readDimacs(inFile, normalized=True)
+    codes = array("i", [2*l if l>0 else 1-2*l for l in lits.tolist()])
+    return numOfVars, codes, array("i", start)
+
+def createInputArray(numOfVars, clauses):
+    '''Flat array of literal codes and clause offsets of a list of clauses.'''
+    lits = array("i")
+    start = array("i", [0])
+    for w in clauses:
+        lits.extend(map(toCode, w))
+        start.append(len(lits))
+    return numOfVars, lits, start
+
+class CDCLArray:
+    def __init__(self, numOfVars, lits, start, resets=True, resetPoint=100, heuristics=False):
+        self.numOfVars = numOfVars
+        self.lits = lits # Literal codes of all clauses (the first two of each clause are watched)
+        self.start = start # Offsets of clauses in lits
+        self.numOfClauses = len(start) - 1
+        self.startNumOfClauses = self.numOfClauses # Used in the end to get the number of conflicts
+        self.value = array("b", [0]) * (2*numOfVars+2) # 1 ... True, -1 ... False, 0 ... unasigned
+        self.level = array("i", [-1]) * (numOfVars+1) # Decision level of each variable
+        self.reason = array("i", [-1]) * (numOfVars+1) # Antecedent clause of each variable
+        self.trail = array("i", [0]) * numOfVars # Literal codes in order of assignment
+        self.trailSize = 0
+        self.trailLim = array("i") # Trail size at the start of each decision level
+        self.qhead = 0 # Position of the next literal on the trail to propagate
+        self.watches = [array("i") for _ in range(2*numOfVars+2)] # Clauses watching each literal code
+        self.seen = bytearray(numOfVars+1) # Marks used in conflict analysis
+        self.resets = resets
+        self.resetPoint = resetPoint
+
+        # Occurrences of each literal code ... used by heuristics
+        self.occurs = array("i", [0]) * (2*numOfVars+2)
+        for c in lits:
+            self.occurs[c] += 1
+
+        # Heap of variables ordered by max(occurs) ... same as in cdcl
+        # heap[0] is the variable that occurs the most, heapPos is its inverse
+        self.heuristics = heuristics
+        self.heap = array("i", range(1, numOfVars+1))
+        self.heapPos = array("i", [0]) * (numOfVars+1)
+        self.heapVal = array("i", [0]) * (numOfVars+1)
+        for i in range(1, numOfVars+1):
+            self.heapPos[i] = i-1
+            self.heapVal[i] = max(self.occurs[2*i], self.occurs[2*i+1])
+        if heuristics:
+            for pos in range(numOfVars//2-1, -1, -1):
+                self.siftDown(pos)
+
+    def siftUp(self, pos):
+        # Move the variable at pos towards the root
+        heap, heapPos, heapVal = self.heap, self.heapPos, self.heapVal
+        i = heap[pos]
+        while pos > 0:
+            parentpos = (pos-1) >> 1
+            parent = heap[parentpos]
+            if heapVal[i] <= heapVal[parent]:
+                break
+            heap[pos] = parent
+            heapPos[parent] = pos
+            pos = parentpos
+        heap[pos] = i
+        heapPos[i] = pos
+
+    def siftDown(self, pos):
+        # Move the variable at pos towards the leaves
+        heap, heapPos, heapVal = self.heap, self.heapPos, self.heapVal
+        endpos = len(heap)
+        i = heap[pos]
+        childpos = 2*pos + 1
+        while childpos < endpos:
+            rightpos = childpos + 1
+            if rightpos < endpos and heapVal[heap[rightpos]] > heapVal[heap[childpos]]:
+                childpos = rightpos
+            if heapVal[heap[childpos]] <= heapVal[i]:
+                break
+            heap[pos] = heap[childpos]
+            heapPos[heap[pos]] = pos
+            pos = childpos
+            childpos = 2*pos + 1
+        heap[pos] = i
+        heapPos[i] = pos
+
+    def assign(self, c, ci):
+        # Set literal code c to True with antecedent clause ci
+        self.value[c] = 1
+        self.value[c^1] = -1
+        self.level[c>>1] = len(self.trailLim)
+        self.reason[c>>1] = ci
+        self.trail[self.trailSize] = c
+        self.trailSize += 1
+
+    def initUnitPropagation(self):
+        # Watch the first two literals of every clause
+        # and assign the literals of unit clauses
+        lits, start, value = self.lits, self.start, self.value
+        for ci in range(self.numOfClauses):
+            s, e = start[ci], start[ci+1]
+            if e - s == 0:
+                # Empty clause
+                return True
+            elif e - s == 1:
+                c = lits[s]
+                if value[c] == -1:
+                    # Contradicting unit clauses
+                    return True
+                elif value[c] == 0:
+                    self.assign(c, ci)
+            else:
+                self.watches[lits[s]].append(ci)
+                self.watches[lits[s+1]].append(ci)
+        return self.unitPropagation() != -1
+
+    def unitPropagation(self):
+        '''Propagate the trail, returns a conflicting clause or -1.'''
+        lits, start, value, watches, trail = self.lits, self.start, self.value, self.watches, self.trail
+        while self.qhead < self.trailSize:
+            falseLit = trail[self.qhead] ^ 1
+            self.qhead += 1
+            ws = watches[falseLit]
+            n = len(ws)
+            i = j = 0
+            while i < n:
+                ci = ws[i]
+                i += 1
+                s = start[ci]
+                # Make sure the False literal is the second watched literal
+                first = lits[s]
+                if first == falseLit:
+                    first = lits[s+1]
+                    lits[s] = first
+                    lits[s+1] = falseLit
+                if value[first] == 1:
+                    # Clause is satisfied by the other watched literal
+                    ws[j] = ci
+                    j += 1
+                    continue
+                # Try to find an unwatched literal that is not False
+                for k in range(s+2, start[ci+1]):
+                    c = lits[k]
+                    if value[c] != -1:
+                        lits[s+1] = c
+                        lits[k] = falseLit
+                        watches[c].append(ci)
+                        break
+                else:
+                    ws[j] = ci
+                    j += 1
+                    if value[first] == -1:
+                        # Conflict ... keep the remaining watches
+                        while i < n:
+                            ws[j] = ws[i]
+                            j += 1
+                            i += 1
+                        del ws[j:]
+                        self.qhead = self.trailSize
+                        return ci
+                    # Unit clause
+                    self.assign(first, ci)
+            del ws[j:]
+        return -1
+
+    def pickBranchingLiteral(self):
+        '''Pick an unasigned variable and its value.'''
+        value, occurs = self.value, self.occurs
+        for i in self.heap:
+            if value[2*i] == 0:
+                return 2*i+1 if occurs[2*i+1] > occurs[2*i] else 2*i
+
+    def conflictAnalysis(self, ci):
+        '''First UIP clause of the conflict and its assertion level.'''
+        lits, start, level, reason, trail, seen = self.lits, self.start, self.level, self.reason, self.trail, self.seen
+        dl = len(self.trailLim)
+        wL = [0] # wL[0] is reserved for the UIP
+        counter = 0 # Literals of the current decision level still to be resolved
+        p = -1
+        idx = self.trailSize - 1
+        while True:
+            # The implied literal of an antecedent is always its first literal
+            for k in range(start[ci] if p == -1 else start[ci]+1, start[ci+1]):
+                c = lits[k]
+                x = c>>1
+                if not seen[x] and level[x] > 0:
+                    seen[x] = 1
+                    if level[x] == dl:
+                        counter += 1
+                    else:
+                        wL.append(c)
+            # Next literal on the trail that is part of the clause
+            while not seen[trail[idx]>>1]:
+                idx -= 1
+            p = trail[idx]
+            idx -= 1
+            seen[p>>1] = 0
+            counter -= 1
+            if counter == 0:
+                break
+            ci = reason[p>>1]
+        wL[0] = p^1
+        for c in wL:
+            seen[c>>1] = 0
+
+        # Assertion level is the highest level of the other literals
+        if len(wL) == 1:
+            return wL, 0
+        m = 1
+        for k in range(2, len(wL)):
+            if level[wL[k]>>1] > level[wL[m]>>1]:
+                m = k
+        wL[1], wL[m] = wL[m], wL[1]
+        return wL, level[wL[1]>>1]
+
+    def assertLevel(self, beta):
+        # Unassign every variable above decision level beta
+        if len(self.trailLim) <= beta:
+            return
+        value, level, reason, trail = self.value, self.level, self.reason, self.trail
+        lim = self.trailLim[beta]
+        for idx in range(self.trailSize-1, lim-1, -1):
+            c = trail[idx]
+            x = c>>1
+            value[c] = 0
+            value[c^1] = 0
+            level[x] = -1
+            reason[x] = -1
+        self.trailSize = lim
+        self.qhead = lim
+        del self.trailLim[beta:]
+
+    def addLearnedClause(self, wL):
+        # Store wL and assign its asserting literal
+        ci = self.numOfClauses
+        self.lits.extend(wL)
+        self.start.append(len(self.lits))
+        self.numOfClauses += 1
+        if len(wL) > 1:
+            self.watches[wL[0]].append(ci)
+            self.watches[wL[1]].append(ci)
+        if self.heuristics:
+            # Update heap and priority values
+            occurs, heapVal = self.occurs, self.heapVal
+            for c in wL:
+                occurs[c] += 1
+                x = c>>1
+                if occurs[c] > heapVal[x]:
+                    heapVal[x] = occurs[c]
+                    self.siftUp(self.heapPos[x])
+        self.assign(wL[0], ci)
+
+    def solve(self):
+        if self.initUnitPropagation():
+            # There was a conflict before any decisions were made
+            return UNSAT
+        while True:
+            ci = self.unitPropagation()
+            if ci != -1:
+                # Found a conflict: conflict analysis
+                if len(self.trailLim) == 0:
+                    # Conflict without any decisions
+                    return UNSAT
+                wL, beta = self.conflictAnalysis(ci)
+                self.assertLevel(beta)
+                self.addLearnedClause(wL)
+            elif self.trailSize == self.numOfVars:
+                return SAT
+            elif self.resets and len(self.trailLim) + 1 > self.resetPoint:
+                # Decision level exceeded resetPoint
+                # We reset the values and start again
+                self.assertLevel(0)
+                self.resetPoint *= 1.1
+            else:
+                c = self.pickBranchingLiteral()
+                self.trailLim.append(self.trailSize)
+                self.assign(c, -1)
+
+    def getModel(self):
+        return [i if self.value[2*i] == 1 else -i for i in range(1, self.numOfVars+1)]
@@ -0,0 +1,343 @@
+# Logic in computer science
+# Project: Implementing a SAT Solver
+# Cube and conquer:
+#   - a lookahead splits the CNF into cubes (partial assignments)
+#   - every cube is solved by an independent CDCL run under assumptions
+#   - cubes are solved by a pool of processes or by workers on
+#     several machines sharing a directory (file based queue)
+#   - every run of the file based queue has its own subdirectory named after
+#     the CNF, workers only join runs of their own CNF, claimed cubes of
+#     workers that stopped are queued again and models are checked
+#   - solving stops when a cube is satisfiable or all are unsatisfiable
+
+import os
+import sys
+import time
+import uuid
+import shutil
+import multiprocessing as mp
+from cdcl import SAT, UNSAT, createInput, CDCL
+from budget import Budget
+from dimacs import readDimacs, toClauses
+from output import UNKNOWN, writeModel, checkModel, modelOfLiterals
+from portfolio import shareClauses, sharedClauses
+from resultcache import canonicalHash
+
+class Cuber:
+    def __init__(self, sat, depth=6, candidates=8):
+        self.sat = sat # CDCL used for propagation
+        self.depth = depth # Cubes have at most depth literals
+        self.candidates = candidates # Number of variables tried by the lookahead
+        self.cubes = []
+        self.refuted = 0 # Cubes found unsatisfiable by the lookahead
+
+    def decide(self, l):
+        '''Set l to True at a new level and propagate, False on a conflict.'''
+        sat = self.sat
+        sat.dl += 1
+        sat.atLevel.append([])
+        sat.setVarValueL(l, None)
+        status, _ = sat.unitPropagation()
+        return not status
+
+    def undo(self):
+        sat = self.sat
+        sat.assertLevel(sat.dl-1)
+
+    def lookahead(self, l):
+        '''Number of variables set by deciding l, -1 on a conflict.'''
+        ok = self.decide(l)
+        n = len(self.sat.atLevel[-1])
+        self.undo()
+        return n if ok else -1
+
+    def pickLiteral(self):
+        '''Literal to split on, None if every variable is set.'''
+        # Variables that occur the most in both polarities are candidates
+        free = [x for x in self.sat.variables.values() if x.val == 0.5]
+        if not free:
+            return None
+        free.sort(key=lambda x: x.containedIn[0] * x.containedIn[1] + max(x.containedIn), reverse=True)
+        best, bestScore = None, -1
+        for x in free[:self.candidates]:
+            # Prefer variables that set the most variables in both branches
+            p, n = self.lookahead(x.i), self.lookahead(-x.i)
+            if p < 0 or n < 0:
+                # Failed literal ... split on it, one branch is refuted right away
+                return x.i if p >= 0 else -x.i
+            score = (p+1) * (n+1)
+            if score > bestScore:
+                best, bestScore = x.i, score
+        return best
+
+    def split(self, cube):
+        # Split cube until it has depth literals
+        if len(cube) == self.depth:
+            self.cubes.append(cube)
+            return
+        l = self.pickLiteral()
+        if l is None:
+            self.cubes.append(cube)
+            return
+        for m in (l, -l):
+            if self.decide(m):
+                self.split(cube + [m])
+            else:
+                self.refuted += 1
+            self.undo()
+
+    def run(self):
+        '''Cubes of the CNF, None if it is unsatisfiable.'''
+        if self.sat.initUnitPropagation():
+            return None
+        status, _ = self.sat.unitPropagation()
+        if status:
+            return None
+        self.split([])
+        return self.cubes
+
+def createCubes(numOfVars, clauses, depth=6):
+    '''Cubes of a CNF, None if it is unsatisfiable.'''
+    cnf, var = createInput(numOfVars, clauses)
+    return Cuber(CDCL(cnf, var, heuristics=True), depth).run()
+
+def solveCube(numOfVars, clauses, cube, options, budget=None):
+    '''Result and model (list of 1/0 indexed by variable) of the CNF under cube.'''
+    cnf, var = createInput(numOfVars, clauses)
+    sat = CDCL(cnf, var, heuristics=True, **options)
+    sat.budget = budget
+    x = sat.solve(cube)
+    model = [0] + [v.val for v in sat.variables.values()] if x == SAT else None
+    return x, model, sat.conflicts
+
+# Clauses of the CNF in every process of the pool
+poolNumOfVars = 0
+poolClauses = None
+
+def initPool(numOfVars, lits, start):
+    global poolNumOfVars, poolClauses
+    poolNumOfVars = numOfVars
+    poolClauses = sharedClauses(lits, start)
+
+def poolTask(task):
+    i, cube, options = task
+    return (i,) + solveCube(poolNumOfVars, poolClauses, cube, options)
+
+def conquerPool(numOfVars, clauses, cubes, workers, options, timeout=None):
+    '''Solve cubes with a pool of processes, UNKNOWN after timeout seconds.'''
+    lits, start = shareClauses(clauses)
+    conflicts = 0
+    deadline = time.time() + timeout if timeout is not None else None
+    with mp.Pool(workers, initPool, (numOfVars, lits, start)) as pool:
+        results = pool.imap_unordered(poolTask, [(i, cube, options) for i, cube in enumerate(cubes)])
+        while True:
+            try:
+                i, x, model, c = results.next(max(0, deadline - time.time()) if deadline is not None else None)
+            except StopIteration:
+                break
+            except mp.TimeoutError:
+                # Leaving the block terminates the workers
+                return UNKNOWN, None, conflicts
+            conflicts += c
+            if x == SAT:
+                # Leaving the block terminates the other workers
+                return SAT, model, conflicts
+    return UNSAT, None, conflicts
+
+def cnfKey(numOfVars, lits, start):
+    '''Prefix of the names of runs of a CNF ... the same for every worker that reads it.'''
+    return canonicalHash(numOfVars, lits, start)[:16]
+
+def touch(path):
+    try:
+        os.utime(path)
+        return True
+    except OSError:
+        # Deleted ... a claim that was queued again or a run that ended
+        return False
+
+def writeCube(runDir, i, cube):
+    # Cubes become visible to workers atomically
+    path = os.path.join(runDir, "cubes", f"{i}.cube")
+    with open(path + ".tmp", "w") as f:
+        f.write(" ".join(map(str, cube)))
+    os.replace(path + ".tmp", path)
+
+def requeue(runDir, remaining, claimTimeout):
+    # Claims that were not refreshed for claimTimeout seconds belong to workers that stopped
+    now = time.time()
+    for entry in os.scandir(os.path.join(runDir, "claimed")):
+        name = entry.name.split(".")[0]
+        try:
+            if int(name) in remaining and now - entry.stat().st_mtime > claimTimeout:
+                os.rename(entry.path, os.path.join(runDir, "cubes", name + ".cube"))
+        except OSError:
+            # The worker finished or gave up the claim in the meantime
+            pass
+
+def conquerFiles(numOfVars, lits, start, cubes, directory, poll=0.5, claimTimeout=60, timeout=None, attempts=3):
+    '''Write cubes to a new run in directory and wait for workers (see work) to solve them,
+    UNKNOWN after timeout seconds.'''
+    run = f"{cnfKey(numOfVars, lits, start)}-{uuid.uuid4().hex[:8]}"
+    runDir = os.path.join(directory, run)
+    for d in ("cubes", "claimed", "results"):
+        os.makedirs(os.path.join(runDir, d))
+    # Workers only join runs whose master is alive ... the time of this file is updated on every poll
+    open(os.path.join(runDir, "alive"), "w").close()
+    for i, cube in enumerate(cubes):
+        writeCube(runDir, i, cube)
+    remaining = set(range(len(cubes)))
+    failed = [0] * len(cubes) # Wrong models of every cube
+    conflicts = 0
+    deadline = time.time() + timeout if timeout is not None else None
+    x, model = UNSAT, None
+    try:
+        while remaining:
+            touch(os.path.join(runDir, "alive"))
+            for i in list(remaining):
+                path = os.path.join(runDir, "results", f"{i}.result")
+                if not os.path.exists(path):
+                    continue
+                with open(path) as f:
+                    r, y, c, *values = f.read().split()
+                if r != run:
+                    raise RuntimeError(f"Result of cube {i} belongs to the run {r}, not {run}")
+                conflicts += int(c)
+                if y == SAT:
+                    values = list(map(int, values))
+                    if all(0 < abs(l) <= numOfVars for l in values):
+                        candidate = modelOfLiterals(numOfVars, values)
+                        if checkModel(lits, start, candidate):
+                            return SAT, candidate, conflicts
+                    # Damaged result or a worker with a different CNF ... the cube is solved again
+                    failed[i] += 1
+                    if failed[i] >= attempts:
+                        raise RuntimeError(f"Cube {i} got a model that does not satisfy the CNF {attempts} times")
+                    os.remove(path)
+                    writeCube(runDir, i, cubes[i])
+                    continue
+                remaining.discard(i)
+            if not remaining:
+                break
+            if deadline is not None and time.time() >= deadline:
+                x = UNKNOWN
+                break
+            requeue(runDir, remaining, claimTimeout)
+            time.sleep(poll)
+    finally:
+        # Workers stop solving cubes of this run and the files are deleted
+        open(os.path.join(runDir, "stop"), "w").close()
+        shutil.rmtree(runDir, ignore_errors=True)
+    return x, model, conflicts
+
+def activeRuns(directory, key, claimTimeout):
+    '''Directories of runs of the CNF with key that are not finished.'''
+    runs = []
+    if not os.path.isdir(directory):
+        return runs
+    now = time.time()
+    for entry in os.scandir(directory):
+        if not entry.name.startswith(key + "-") or os.path.exists(os.path.join(entry.path, "stop")):
+            continue
+        try:
+            if now - os.stat(os.path.join(entry.path, "alive")).st_mtime <= claimTimeout:
+                runs.append(entry.path)
+        except OSError:
+            # Not started yet or already deleted
+            pass
+    return sorted(runs)
+
+def claim(runDir):
+    '''Path of a cube of the run claimed by this worker, None if there is none.'''
+    cubeDir = os.path.join(runDir, "cubes")
+    try:
+        names = sorted(n for n in os.listdir(cubeDir) if n.endswith(".cube"))
+    except OSError:
+        return None
+    for name in names:
+        claimed = os.path.join(runDir, "claimed", f"{name}.{os.getpid()}")
+        try:
+            os.rename(os.path.join(cubeDir, name), claimed)
+        except OSError:
+            # Another worker claimed it first
+            continue
+        # Renaming keeps the time the cube was written ... the claim is fresh now
+        if touch(claimed):
+            return claimed
+    return None
+
+def work(inFile, directory, poll=0.5, claimTimeout=60, **options):
+    # Worker of the file based queue ... claims cubes by renaming them,
+    # stops when the runs of its CNF it worked on are finished
+    numOfVars, lits, start = readDimacs(inFile)
+    key = cnfKey(numOfVars, lits, start)
+    clauses = toClauses(lits, start)
+    joined = False
+    while True:
+        runs = activeRuns(directory, key, claimTimeout)
+        if not runs:
+            if joined:
+                return
+            time.sleep(poll)
+            continue
+        joined = True
+        for runDir in runs:
+            claimed = claim(runDir)
+            if claimed is not None:
+                break
+        else:
+            time.sleep(poll)
+            continue
+        try:
+            with open(claimed) as f:
+                cube = list(map(int, f.read().split()))
+        except OSError:
+            continue
+        run = os.path.basename(runDir)
+        refreshed = [time.time()]
+        def heartbeat():
+            # Keep the claim fresh, stop if it was lost or the run ended
+            if time.time() - refreshed[0] >= claimTimeout / 4:
+                refreshed[0] = time.time()
+                if not touch(claimed):
+                    return True
+            return os.path.exists(os.path.join(runDir, "stop"))
+        x, model, c = solveCube(numOfVars, clauses, cube, options, Budget(callback=heartbeat))
+        if x == UNKNOWN:
+            continue
+        path = os.path.join(runDir, "results", os.path.basename(claimed).split(".")[0] + ".result")
+        try:
+            with open(path + ".tmp", "w") as f:
+                f.write(f"{run} {x} {c}")
+                if x == SAT:
+                    f.write(" " + " ".join(str(i) if model[i] == 1 else str(-i) for i in range(1, len(model))))
+            os.replace(path + ".tmp", path)
+        except OSError:
+            # The run ended and its directory was deleted
+            pass
+
+def solve(inFile, outFile, workers=None, depth=6, directory=None, conflicts=False, timeout=None, **options):
+    numOfVars, lits, start = readDimacs(inFile)
+    clauses = toClauses(lits, start)
+    t = time.time()
+    cubes = createCubes(numOfVars, clauses, depth)
+    if cubes is None:
+        print("Lookahead found a conflict.")
+        x, model, numOfConflicts = UNSAT, None, 0
+    else:
+        print(f"Split into {len(cubes)} cubes in {round(time.time()-t, 2)}s.")
+        if directory is not None:
+            x, model, numOfConflicts = conquerFiles(numOfVars, lits, start, cubes, directory, timeout=timeout)
+        else:
+            x, model, numOfConflicts = conquerPool(numOfVars, clauses, cubes, workers or os.cpu_count(), options, timeout)
+    if conflicts:
+        print(f"{numOfConflicts} conflicts")
+    print(x)
+    writeModel(outFile, x, model)
+
+def main():
+    # Run a worker: python cube.py <inputfilename> <directory>
+    work(sys.argv[1], sys.argv[2])
+
+if __name__ == "__main__":
+    main()
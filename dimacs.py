@@ -0,0 +1,221 @@
+# Logic in computer science
+# Project: Implementing a SAT Solver
+# Reading CNFs in DIMACS format:
+#   - the whole file is read at once, through mmap if possible
+#   - .gz, .bz2 and .xz files are decompressed transparently
+#   - comments may be anywhere and clauses may span several lines
+#   - literals of all clauses end up in a flat array with clause offsets
+#   - parsed files can be stored in a binary format, which is loaded
+#     through mmap without parsing ... big files are cached automatically,
+#     least recently used files are deleted when the cache gets too big
+
+import gc
+import os
+import re
+import sys
+import struct
+import hashlib
+import gzip
+import bz2
+import lzma
+import mmap
+from contextlib import contextmanager
+from array import array
+from itertools import compress, count, repeat
+from operator import add, not_, sub
+from time import time
+import cachefiles
+
+DECOMPRESS = {".gz": gzip.decompress, ".bz2": bz2.decompress, ".xz": lzma.decompress} # Compressed files by extension
+HEADER = re.compile(rb"^p\s+cnf\s+(\d+)\s+(\d+)", re.M)
+COMMENT = re.compile(rb"^\s*c.*$", re.M)
+
+# Binary format: header (magic, number of variables, clauses and literals),
+# clause offsets and literals as 32-bit integers, all in little-endian byte order
+MAGIC = b"SATCNF01"
+BINARY_HEADER = struct.Struct("<8sqqq")
+
+parseTime = 0 # Time spent reading the last file
+cacheDir = os.environ.get("SATSOLVER_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "satsolver")) # None disables the cache
+cacheMinSize = 1<<20 # Smaller files are parsed every time
+cacheMaxSize = int(float(os.environ.get("SATSOLVER_CACHE_SIZE", 1024)) * (1<<20)) # Bytes of all cached files
+
+def readFile(inFile, useMmap=True):
+    '''Raw contents of a file, mapped into memory if possible.'''
+    with open(inFile, "rb") as f:
+        if useMmap:
+            try:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                # Empty files and some file systems can not be mapped
+                pass
+        return f.read()
+
+def decompress(inFile, data):
+    '''Contents of a (possibly compressed) file with raw contents data.'''
+    for ext, func in DECOMPRESS.items():
+        if inFile.endswith(ext):
+            return func(data)
+    return data
+
+def parse(data):
+    '''Number of variables, literals of all clauses and clause offsets of a CNF.'''
+    header = HEADER.search(data)
+    if header is None:
+        raise ValueError("Missing 'p cnf' header")
+    numOfVars = int(header.group(1))
+    body = data[header.end():]
+    end = body.find(b"\n%")
+    if end != -1:
+        # SATLIB files end with a line starting with %
+        body = body[:end]
+    if b"c" in body:
+        body = COMMENT.sub(b"", body)
+    tokens = list(map(int, body.split()))
+
+    # Clause i is lits[start[i]:start[i+1]] ... the k-th zero ends clause k
+    zeros = compress(count(), map(not_, tokens))
+    start = array("i", [0] + list(map(sub, zeros, count())))
+    lits = array("i", list(filter(None, tokens)))
+    if len(lits) > start[-1]:
+        # Last clause without a terminating zero
+        start.append(len(lits))
+    return numOfVars, lits, start
+
+def normalize(numOfVars, lits, start):
+    '''CNF without duplicate literals in clauses and without tautologies.'''
+    flat = lits.tolist()
+    vs = list(map(abs, flat))
+    bounds = start.tolist()
+    # Clauses that contain a variable more than once
+    bad = [i for i, (s, e) in enumerate(zip(bounds, bounds[1:])) if len(set(vs[s:e])) < e-s]
+    if not bad:
+        return numOfVars, lits, start
+    lits = array("i")
+    start = array("i", [0])
+    prev = 0 # Clauses from prev to the next bad one are copied as they are
+    for i in bad + [len(bounds)-1]:
+        shift = len(lits) - bounds[prev]
+        lits.extend(flat[bounds[prev]:bounds[i]])
+        start.extend(map(add, bounds[prev+1:i+1], repeat(shift)))
+        if i == len(bounds)-1:
+            break
+        # Remove duplicate literals
+        w = list(dict.fromkeys(flat[bounds[i]:bounds[i+1]]))
+        if not any(-l in w for l in w):
+            # Not a tautology ... the clause is not always satisfied
+            lits.extend(w)
+            start.append(len(lits))
+        prev = i+1
+    return numOfVars, lits, start
+
+def writeBinary(outFile, numOfVars, lits, start):
+    # Store a normalized CNF in the binary format
+    if sys.byteorder != "little":
+        start = array("i", start)
+        start.byteswap()
+        lits = array("i", lits)
+        lits.byteswap()
+    with cachefiles.atomicWrite(outFile, "wb") as f:
+        f.write(BINARY_HEADER.pack(MAGIC, numOfVars, len(start)-1, len(lits)))
+        f.write(memoryview(start).cast("B"))
+        f.write(memoryview(lits).cast("B"))
+
+def readBinary(data):
+    '''Number of variables, literals and clause offsets of a CNF in the binary format.
+    Literals and offsets are views of data ... nothing is copied.
+    Raises ValueError if data is truncated or damaged.'''
+    if len(data) < BINARY_HEADER.size:
+        raise ValueError("Not a CNF in the binary format")
+    magic, numOfVars, numOfClauses, numOfLits = BINARY_HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a CNF in the binary format")
+    if numOfClauses < 0 or numOfLits < 0 or len(data) != BINARY_HEADER.size + 4*(numOfClauses+1) + 4*numOfLits:
+        raise ValueError("Truncated or damaged CNF in the binary format")
+    view = memoryview(data)
+    pos = BINARY_HEADER.size
+    start = view[pos:pos + 4*(numOfClauses+1)].cast("i")
+    pos += 4*(numOfClauses+1)
+    lits = view[pos:pos + 4*numOfLits].cast("i")
+    if sys.byteorder != "little":
+        # Copies in native byte order
+        start = array("i", start)
+        start.byteswap()
+        lits = array("i", lits)
+        lits.byteswap()
+    if start[0] != 0 or start[-1] != numOfLits:
+        raise ValueError("Truncated or damaged CNF in the binary format")
+    return numOfVars, lits, start
+
+def cachePath(data):
+    '''Name of the cached binary file of a file with raw contents data, None if not cached.'''
+    if cacheDir is None or len(data) < cacheMinSize:
+        return None
+    return os.path.join(cacheDir, hashlib.sha1(data).hexdigest() + ".cnfb")
+
+def readDimacs(inFile, useMmap=True, normalized=False):
+    '''Number of variables, literals of all clauses and clause offsets of a DIMACS file.
+    If normalized, clauses contain no duplicate literals and no tautologies.'''
+    global parseTime
+    t = time()
+    data = readFile(inFile, useMmap)
+    if data[:len(MAGIC)] == MAGIC:
+        # File is already in the binary format ... always normalized
+        res = readBinary(data)
+    else:
+        path = cachePath(data)
+        res = None
+        if path is not None and os.path.exists(path):
+            # File was parsed before
+            try:
+                res = readBinary(readFile(path, useMmap))
+                cachefiles.touch(path)
+            except ValueError:
+                # Damaged cached file ... deleted and the file is parsed again
+                cachefiles.remove(path)
+            except OSError:
+                pass
+        if res is None:
+            res = parse(decompress(inFile, data))
+            if normalized or path is not None:
+                res = normalize(*res)
+            if path is not None:
+                cachefiles.store(path, lambda p: writeBinary(p, *res), cacheMaxSize)
+        if isinstance(data, mmap.mmap):
+            data.close()
+    parseTime = time() - t
+    return res
+
+def readData(data, normalized=False):
+    '''Number of variables, literals of all clauses and clause offsets of a CNF
+    in DIMACS or the binary format that is already in memory (e.g. received
+    by the server).'''
+    if data[:len(MAGIC)] == MAGIC:
+        return readBinary(data)
+    res = parse(data)
+    return normalize(*res) if normalized else res
+
+@contextmanager
+def pausedGC():
+    '''Block without garbage collection ... it only slows down creating many new objects.'''
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+def toClauses(lits, start):
+    '''Clauses (lists of literals) of a flat array of literals and clause offsets.'''
+    lits = lits.tolist()
+    start = start.tolist()
+    with pausedGC():
+        return [lits[s:e] for s, e in zip(start, start[1:])]
+
+def main():
+    # Convert a DIMACS file: python dimacs.py <inputfilename> <outputfilename>
+    writeBinary(sys.argv[2], *readDimacs(sys.argv[1], normalized=True))
+
+if __name__ == "__main__":
+    main()
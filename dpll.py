@@ -2,136 +2,186 @@
 # Homework: Implementing a SAT Solver
 
 import sys
+from dimacs import readDimacs, toClauses
+from output import SAT, UNSAT, UNKNOWN, writeModel, modelOfLiterals
+
+def dpll(cnf, numOfVars=729, usePureLiterals=True, budget=None):
+    '''Literals of a model of cnf in the order they were set (variables that
+    were not needed are missing), None if cnf is unsatisfiable or the
+    budget ran out (then budget.reason is set).'''
+    # Lists indexed by literals ... l is at position l and -l
+    # at position -l, which is counted from the end of the list
+    size = 2*numOfVars + 1
+    value = [0] * size # 1 ... True, -1 ... False, 0 ... not set
+    occurs = [[] for _ in range(size)] # Indices of clauses containing each literal
+    sizes = [len(orList) for orList in cnf] # Number of literals in each clause
+    numTrue = [0] * len(cnf) # Number of True literals in each clause
+    numFalse = [0] * len(cnf) # Number of False literals in each clause
+    unsatisfiedIn = [0] * size # Number of unsatisfied clauses containing each literal
+    pure = [] # Literals that may have become pure ... their negations are in no unsatisfied clause
+    trail = [] # Set literals in the order they were set
+    levels = [] # (length of trail, literal, other value tried, first) of every decision
+    head = 0 # Literals in trail[:head] were already propagated
+    satisfied = 0 # Number of clauses with a True literal
+    first = 0 # Clauses before first are satisfied
+    conflicts = 0 # Number of conflicts found
+    decisions = 0 # Number of decisions
+    nextCheck = budget.start() if budget is not None else float("inf") # Check the budget when conflicts + decisions reach this number
+
+    for i, orList in enumerate(cnf):
+        if len(orList) == 0:
+            return None # empty disjunction = FALSE => conjunction is also FALSE
+        for l in orList:
+            occurs[l].append(i)
+            unsatisfiedIn[l] += 1
+    if usePureLiterals:
+        pure = [l for l in range(-numOfVars, numOfVars+1) if unsatisfiedIn[l] and not unsatisfiedIn[-l]]
+    for orList in cnf:
+        if len(orList) == 1:
+            # Unit clause
+            l = orList[0]
+            if value[l] == -1:
+                return None
+            elif value[l] == 0:
+                value[l] = 1
+                value[-l] = -1
+                trail.append(l)
+
+    def propagate():
+        '''Update the counters of the set literals and set literals of unit clauses, True on a conflict.'''
+        nonlocal head, satisfied
+        while head < len(trail):
+            # Counters of every clause containing l are updated
+            # before anything else, so undo can revert them
+            l = trail[head]
+            head += 1
+            for i in occurs[l]:
+                if numTrue[i] == 0:
+                    satisfied += 1
+                    if usePureLiterals:
+                        # Clause is satisfied ... its literals occur in one less
+                        # unsatisfied clause and their negations may become pure
+                        for k in cnf[i]:
+                            unsatisfiedIn[k] -= 1
+                            if unsatisfiedIn[k] == 0:
+                                pure.append(-k)
+                numTrue[i] += 1
+            conflict = False
+            units = []
+            for i in occurs[-l]:
+                numFalse[i] += 1
+                if numTrue[i] == 0:
+                    left = sizes[i] - numFalse[i]
+                    if left == 0:
+                        conflict = True
+                    elif left == 1:
+                        units.append(i)
+            if conflict:
+                return True
+            for i in units:
+                if numTrue[i] == 0:
+                    # Set the only literal that is not False, if it was
+                    # set to False in the meantime, the conflict is found later
+                    for k in cnf[i]:
+                        if value[k] == 0:
+                            value[k] = 1
+                            value[-k] = -1
+                            trail.append(k)
+                            break
+        return False
+
+    def undo(pos):
+        # Unset literals in trail[pos:]
+        nonlocal head, satisfied
+        for j in range(len(trail)-1, pos-1, -1):
+            l = trail[j]
+            if j < head:
+                for i in occurs[l]:
+                    numTrue[i] -= 1
+                    if numTrue[i] == 0:
+                        satisfied -= 1
+                        if usePureLiterals:
+                            for k in cnf[i]:
+                                unsatisfiedIn[k] += 1
+                for i in occurs[-l]:
+                    numFalse[i] -= 1
+            value[l] = 0
+            value[-l] = 0
+        del trail[pos:]
+        head = min(head, pos)
+        # Decisions are only made when there are no pure literals,
+        # so there are none left after undoing back to a decision
+        pure.clear()
 
-def dpll(cnf, numOfVars=729, usePureLiterals=True):
-    varVals = [None]*numOfVars
-    solved = 0
-    
     while True:
-        if len(cnf) == 0:
-            return varVals
-        
-        unitClauses = dict() # a dictionary of all clauses that only have a single literal
-        pureLiterals = dict() # dictionary of type name:val for every pure literal
-        notPureLiterals = set() # list of literals that are not pure
-        clausesToRemove = set() # clauses to be removed
+        if conflicts + decisions >= nextCheck:
+            # Budget is only checked every few conflicts and decisions
+            if budget.check(conflicts, decisions):
+                return None
+            nextCheck = budget.next(conflicts, decisions)
 
-        for i, orList in enumerate(cnf):
-            # Traverse through cnf searching for empty disjunctions, unit clauses and pure literals
-            if len(orList) == 0:
-                return None # empty disjunction = FALSE => conjunction is also FALSE
-            elif len(orList) == 1:
-                # Found a literal
-                l = orList[0]
-                if abs(l) in unitClauses:
-                    # It can either be that the clause evaluates into True
-                    # Or it can be that l is the negation of the literal in
-                    # unitClauses and the problem is NONSAT
-                    # In both cases it will be handled later
-                    continue
-                elif abs(l) in pureLiterals:
-                    del pureLiterals[abs(l)]
-                varVals[solved] = l # add literal to output
-                solved += 1
-                unitClauses[abs(l)] = l>0 # add literal to the dict of unit clauses
-                clausesToRemove.add(i) # add clause to clauses to be removed
-            elif usePureLiterals:
-                for l in orList:
-                    # Traverse through the literals in the disjunction
-                    # Searching for pure literals
-                    absl = abs(l)
-                    if absl in unitClauses or absl in notPureLiterals:
-                        # Literal is either a unit clause ... don't care if it is also pure
-                        # or we already not it's not pure
-                        continue
-                    elif absl in pureLiterals:
-                        if (l>0 and pureLiterals[absl][0]) or (l<=0 and not pureLiterals[absl][0]): # equality can be ignored, since variable names are != 0
-                            pureLiterals[absl][1].append(i)
-                        else:
-                            del pureLiterals[absl]
-                            notPureLiterals.add(absl)
-                    else:
-                        pureLiterals[absl] = (l>0, [i])
-        
-        if len(clausesToRemove) == len(cnf):
+        if propagate():
+            # Conflict ... try the other value of the last decision
+            # for which it was not tried yet
+            conflicts += 1
+            while levels and levels[-1][2]:
+                levels.pop()
+            if not levels:
+                return None
+            pos, l, _, first = levels.pop()
+            undo(pos)
+            levels.append((pos, -l, True, first))
+            value[-l] = 1
+            value[l] = -1
+            trail.append(-l)
+            continue
+
+        if satisfied == len(cnf):
             # Every clause evaluated into True => the whole formula is true
-            return varVals
-        elif len(unitClauses) == 0 and len(pureLiterals) == 0:
-            # There are no unit clauses and/or pure literals
-            # We must choose a variable and its value
-            # First break out of the while loop
-            break
+            return trail
 
-        # For pure literals: add the clauses containing them
-        # to the set clausesToRemove, because we can evaluate
-        # all of those disjunctions into True (= remove them)
-        for l in pureLiterals:
-            if pureLiterals[l][0]:
-                varVals[solved] = l
-            else:
-                varVals[solved] = -l
-            solved += 1
-            for i in pureLiterals[l][1]:
-                clausesToRemove.add(i)
-        
-        # We now remove all clauses whose indices are contained
-        # in the set clausesToRemove, while traversing the list
-        # of the remaining clauses and checking if they contain
-        # any of the literals from unit clauses
-        cnfNew = [None]*(len(cnf)-len(clausesToRemove))
-        j = 0 # index for traversing through cnfNew
-        for i in range(len(cnf)):
-            if i in clausesToRemove:
+        if pure:
+            # Pure literals can be set to True without any decision
+            for l in pure:
+                if value[l] == 0 and unsatisfiedIn[l] and not unsatisfiedIn[-l]:
+                    value[l] = 1
+                    value[-l] = -1
+                    trail.append(l)
+            pure.clear()
+            if head < len(trail):
                 continue
-            else:
-                newOr = []
-                for l in cnf[i]:
-                    absl = abs(l)
-                    if absl in unitClauses:
-                        if (l>0 and unitClauses[absl]) or (l<=0 and not unitClauses[absl]):
-                            # Clause evaluates into True
-                            break
-                        else:
-                            # Remove literal from clause
-                            continue
-                    else:
-                        newOr.append(l)
-                else:
-                    # Loop ended - clause remains
-                    cnfNew[j] = newOr
-                    j += 1
-        cnf = cnfNew[:j]
-    
-    # Take the first literal ... try to solve if it is True and False
-    i1 = cnf[0][0]
-    d = dpll(cnf + [[i1]], numOfVars-solved) or dpll(cnf + [[-i1]], numOfVars-solved)
-    if d:
-        varVals[solved:] = d
-        return varVals
-    else:
-        return d
+
+        # Take the first literal that is not set of the first unsatisfied clause
+        while numTrue[first]:
+            first += 1
+        for l in cnf[first]:
+            if value[l] == 0:
+                break
+        levels.append((len(trail), l, False, first))
+        decisions += 1
+        value[l] = 1
+        value[-l] = -1
+        trail.append(l)
 
 def createCNF(inFile):
-    with open(inFile) as f:
-        line = f.readline()
-        while line[0] == "c":
-            line = f.readline()
-        _,_,numOfVars,numOfClauses = line.split()
-        cnf = [None] * int(numOfClauses)
-        for i in range(len(cnf)):
-            line = f.readline()
-            cnf[i] = [int(j) for j in line.split()[:-1]]
-    return cnf, int(numOfVars)
+    # Clauses without duplicate literals and tautologies
+    numOfVars, lits, start = readDimacs(inFile, normalized=True)
+    return toClauses(lits, start), numOfVars
 
-def solve(inFile, outFile, usePureLiterals=True):
+def solve(inFile, outFile, usePureLiterals=True, budget=None):
     cnf, numOfVars = createCNF(inFile)
-    solution = dpll(cnf, numOfVars, usePureLiterals)
-    print("SATISFIED" if solution else "UNSATISFIABLE")
-    with open(outFile, "w") as f:
-        if solution:
-            f.write(" ".join(map(str,solution)))
-        else:
-            f.write("0")
+    solution = dpll(cnf, numOfVars, usePureLiterals, budget)
+    if solution is not None:
+        x = SAT
+    elif budget is not None and budget.reason is not None:
+        x = UNKNOWN
+    else:
+        x = UNSAT
+    print("UNSATISFIABLE" if x == UNSAT else x)
+    if x == UNKNOWN:
+        print(f"Stopped by the {budget.reason}.")
+    # Literals are in the order they were set and unneeded variables are missing
+    writeModel(outFile, x, modelOfLiterals(numOfVars, solution) if x == SAT else None)
 
 def main():
     solve(sys.argv[1], sys.argv[2])
@@ -1,7 +1,7 @@
 # Updated version of heapq from standard library
 # Updated to be used on variables from cdcl
 
-__all__ = ['heapify', 'decreaseKey']
+__all__ = ['heapify', 'decreaseKey', 'heappush', 'heappop']
 
 def _siftup(heap, pos):
     endpos = len(heap)
@@ -45,4 +45,23 @@ def decreaseKey(heap, pos, startpos=0):
 def heapify(x):
     n = len(x)
     for i in range(n//2-1, -1, -1):
-        _siftup(x, i)
\ No newline at end of file
+        _siftup(x, i)
+
+def heappush(heap, item):
+    """Push item onto heap, maintaining the heap invariant."""
+    heap.append(item)
+    item.heapPos = len(heap)-1
+    decreaseKey(heap, item.heapPos)
+
+def heappop(heap):
+    """Pop the item with the largest heapVal off the heap, maintaining the heap invariant."""
+    lastelt = heap.pop()
+    if heap:
+        returnitem = heap[0]
+        heap[0] = lastelt
+        lastelt.heapPos = 0
+        _siftup(heap, 0)
+    else:
+        returnitem = lastelt
+    returnitem.heapPos = None
+    return returnitem
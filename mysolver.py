@@ -4,13 +4,24 @@
 import sys
 from time import time
 from getopt import getopt
+import dimacs
+import output
+from budget import Budget
+from resultcache import ResultCache
 from dpll import solve as solvedpll
 from cdcl import solve as solvecdcl
+from portfolio import solve as solveportfolio
+from cube import solve as solvecube
+
+def printTimes(t):
+    # Time spent parsing the input is also reported separately
+    print(f"Parsed input in {round(dimacs.parseTime, 2)}s.")
+    print(f"Solved in {round(time()-t, 2)}s.")
 
 def main():
     inFile = sys.argv[1]
     outFile = sys.argv[2]
-    options, _ = getopt(sys.argv[3:], "drp:hlct", ["dpll", "resets", "resetPoint=", "heuristics", "pureLiterals", "conflicts", "time"])
+    options, _ = getopt(sys.argv[3:], "drp:hlctms", ["dpll", "resets", "resetPoint=", "heuristics", "pureLiterals", "conflicts", "time", "compact", "simplify", "varDecay=", "reduceBase=", "reduceInc=", "reduceFraction=", "keepLbd=", "restart=", "restartBase=", "phase=", "rephaseInterval=", "seed=", "randomFreq=", "portfolio=", "share", "cube=", "workers=", "cubeDir=", "noCache", "competition", "proof=", "textProof", "stats=", "progress=", "timeLimit=", "conflictLimit=", "decisionLimit=", "memoryLimit=", "resultCache=", "resultCacheSize="])
 
     # Default values
     dpll = False
@@ -20,6 +31,21 @@ def main():
     usePureLiterals = True
     conflicts = False
     printTime = False
+    compact = False
+    simplify = False
+    portfolio = 0 # Number of worker processes, 0 means no portfolio
+    share = False # Portfolio workers share learned clauses
+    cube = 0 # Depth of cubes, 0 means no cube and conquer
+    workers = None # Number of processes solving cubes
+    cubeDir = None # Directory of the file based queue of cubes
+    proofFile = None # DRAT proof of unsatisfiability, None means no proof
+    binaryProof = True
+    statsFile = None # JSON file with statistics of the CDCL algorithm, None means no file
+    progress = 0 # Conflicts between progress lines, 0 means no progress lines
+    limits = {} # Limits of the search (time, conflicts, decisions, memory), none means no budget
+    resultCacheDir = None # Directory of cached results, None means no cache
+    resultCacheSize = 64 # Megabytes of cached results
+    cdclOptions = {} # Additional options of the CDCL algorithm
 
     # Update options
     for o,v in options:
@@ -35,23 +61,98 @@ def main():
             conflicts = True
         elif o == "-t" or o == "--time":
             printTime = True
+        elif o == "-m" or o == "--compact":
+            compact = True
+        elif o == "-s" or o == "--simplify":
+            simplify = True
+        elif o == "--portfolio":
+            portfolio = int(v)
+        elif o == "--share":
+            share = True
+        elif o == "--cube":
+            cube = int(v)
+        elif o == "--workers":
+            workers = int(v)
+        elif o == "--cubeDir":
+            cubeDir = v
+        elif o == "--noCache":
+            dimacs.cacheDir = None
+        elif o == "--competition":
+            output.competition = True
+        elif o == "--proof":
+            proofFile = v
+        elif o == "--textProof":
+            binaryProof = False
+        elif o == "--stats":
+            statsFile = v
+        elif o == "--progress":
+            progress = int(v)
+        elif o == "--resultCache":
+            resultCacheDir = v
+        elif o == "--resultCacheSize":
+            resultCacheSize = float(v)
+        elif o in ("--timeLimit", "--memoryLimit"):
+            limits[o[2:]] = float(v)
+        elif o in ("--conflictLimit", "--decisionLimit"):
+            limits[o[2:]] = int(v)
+        elif o in ("--varDecay", "--reduceFraction", "--randomFreq"):
+            cdclOptions[o[2:]] = float(v)
+        elif o in ("--restart", "--phase"):
+            cdclOptions[o[2:]] = v
+        elif o in ("--reduceBase", "--reduceInc", "--keepLbd", "--restartBase", "--rephaseInterval", "--seed"):
+            cdclOptions[o[2:]] = int(v)
         else:
             usePureLiterals = False
     
+    if outFile == "-":
+        # The result is written to the standard output, messages go to the standard error
+        sys.stdout = sys.stderr
+    if proofFile is not None and (dpll or cube or portfolio or compact):
+        print("Proofs are only written by the CDCL algorithm, no proof will be written.")
+    budget = Budget(**limits) if limits else None
+    resultCache = ResultCache(resultCacheDir, int(resultCacheSize * (1<<20))) if resultCacheDir is not None else None
+    if resultCache is not None and (dpll or cube or portfolio):
+        print("Results are only cached by the CDCL algorithm, the cache is not used.")
+    if budget is not None and compact:
+        print("Budgets are only used by the DPLL and CDCL algorithms, the search is not limited.")
+    elif budget is not None and cube and set(limits) != {"timeLimit"}:
+        print("Cube and conquer only uses the time limit, the other limits are ignored.")
+
     # Create CNF
     if dpll:
         # DPLL
         print("Running DPLL algorithm.")
         t = time()
-        solvedpll(inFile, outFile, usePureLiterals)
+        solvedpll(inFile, outFile, usePureLiterals, budget)
+        if printTime:
+            printTimes(t)
+    elif cube:
+        # Cube and conquer
+        print(f"Running cube and conquer with cubes of depth {cube}{' in ' + cubeDir if cubeDir else ''}.")
+        t = time()
+        solvecube(inFile, outFile, workers, cube, cubeDir, conflicts, limits.get("timeLimit"), **cdclOptions)
         if printTime:
-            print(f"Solved in {round(time()-t, 2)}s.")
+            printTimes(t)
+    elif portfolio:
+        # Portfolio of CDCL workers
+        print(f"Running a portfolio of {portfolio} CDCL workers{' sharing learned clauses' if share else ''}.")
+        t = time()
+        solveportfolio(inFile, outFile, portfolio, resets, resetPoint, heuristics, conflicts, simplify, share, limits, **cdclOptions)
+        if printTime:
+            printTimes(t)
     else:
-        print(f"Running CDCL algorithm {'with' if resets else 'without'} resets, {'with a reset point at ' + str(resetPoint) + ', ' if resets else ''}and {'with' if heuristics else 'without'} heuristics.")
+        restart = cdclOptions.get("restart", "depth")
+        if not resets:
+            resetInfo = "without resets, "
+        elif restart == "depth":
+            resetInfo = f"with resets, with a reset point at {resetPoint}, "
+        else:
+            resetInfo = f"with {restart} resets, "
+        print(f"Running {'compact ' if compact else ''}CDCL algorithm {resetInfo}and {'with' if heuristics else 'without'} heuristics.")
         t = time()
-        solvecdcl(inFile, outFile, resets, resetPoint, heuristics, conflicts)
+        solvecdcl(inFile, outFile, resets, resetPoint, heuristics, conflicts, compact, simplify, proofFile, binaryProof, statsFile, progress, budget, resultCache, **cdclOptions)
         if printTime:
-            print(f"Solved in {round(time()-t, 2)}s.")
+            printTimes(t)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
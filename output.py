@@ -0,0 +1,86 @@
+# Logic in computer science
+# Project: Implementing a SAT Solver
+# Writing results:
+#   - the model is written in chunks, the whole string is never built
+#   - default format: 0 if unsatisfiable, UNKNOWN if the search was stopped
+#     (see budget), else literals seperated by spaces
+#   - competition format: "s SATISFIABLE" and "v ... 0" lines
+#   - output file "-" is the standard output
+#   - written results can be read back and checked against the CNF
+
+import sys
+
+SAT = "SATISFIED"
+UNSAT = "UNSATISFIED"
+UNKNOWN = "UNKNOWN" # Search was stopped before it found the result
+
+competition = False # Write results in the SAT competition format
+stdout = sys.stdout # Output file "-" ... stays the standard output if messages are redirected
+CHUNK = 4096 # Number of literals written at once
+LINE = 10 # Literals in a "v" line of the competition format
+
+def literals(model, start, end):
+    '''Literals of variables start, ..., end-1 of model (list of 1/0 indexed by variable).'''
+    return [str(i) if model[i] == 1 else str(-i) for i in range(start, end)]
+
+def writeDefault(f, x, model):
+    if x != SAT:
+        f.write("0" if x == UNSAT else UNKNOWN)
+        return
+    n = len(model)
+    for start in range(1, n, CHUNK):
+        if start > 1:
+            f.write(" ")
+        f.write(" ".join(literals(model, start, min(start+CHUNK, n))))
+
+def writeCompetition(f, x, model):
+    if x != SAT:
+        f.write("s UNSATISFIABLE\n" if x == UNSAT else "s UNKNOWN\n")
+        return
+    f.write("s SATISFIABLE\n")
+    n = len(model)
+    for start in range(1, n, CHUNK):
+        lits = literals(model, start, min(start+CHUNK, n))
+        f.write("".join("v " + " ".join(lits[k:k+LINE]) + "\n" for k in range(0, len(lits), LINE)))
+    f.write("v 0\n")
+
+def writeModel(outFile, x, model):
+    '''Write the result x and model (list of 1/0 indexed by variable) to outFile.'''
+    write = writeCompetition if competition else writeDefault
+    if outFile == "-":
+        write(stdout, x, model)
+        stdout.flush()
+    else:
+        with open(outFile, "w") as f:
+            write(f, x, model)
+
+def modelOfLiterals(numOfVars, lits):
+    '''Model (list of 1/0 indexed by variable) of literals in any order ... missing variables are False.'''
+    model = [0] * (numOfVars+1)
+    for l in lits:
+        if l is not None and l>0:
+            model[l] = 1
+    return model
+
+def readModel(inFile):
+    '''Result and literals of a file written in any of the formats.'''
+    with open(inFile) as f:
+        lines = f.read().split("\n")
+    if lines[0].startswith("s "):
+        x = {"s SATISFIABLE": SAT, "s UNSATISFIABLE": UNSAT, "s UNKNOWN": UNKNOWN}.get(lines[0].strip())
+        lits = [int(l) for line in lines[1:] if line.startswith("v ") for l in line.split()[1:]]
+        return x, [l for l in lits if l != 0]
+    if lines[0].strip() == UNKNOWN:
+        return UNKNOWN, []
+    lits = [int(l) for line in lines for l in line.split()]
+    return (UNSAT, []) if lits == [0] else (SAT, lits)
+
+def checkModel(lits, start, model):
+    '''Every clause (literals lits[start[i]:start[i+1]]) is satisfied by model (list of 1/0 indexed by variable).'''
+    for s, e in zip(start, start[1:]):
+        for l in lits[s:e]:
+            if model[l if l>0 else -l] == (1 if l>0 else 0):
+                break
+        else:
+            return False
+    return True
@@ -0,0 +1,148 @@
+# Logic in computer science
+# Project: Implementing a SAT Solver
+# Portfolio of CDCL solvers:
+#   - the CNF is read once and kept in shared memory
+#   - every worker process runs CDCL with different options and seed,
+#     on top of the options given by the caller
+#   - the first answer wins and the other workers are stopped
+#   - optionally workers share short learned clauses (see sharing)
+#   - budgets limit every worker, the result is UNKNOWN if all of them run out
+
+import multiprocessing as mp
+from multiprocessing.sharedctypes import RawArray
+from cdcl import SAT, UNSAT, readClauses, createInput, CDCL
+from budget import Budget
+from output import UNKNOWN, writeModel
+from preprocess import Preprocessor
+from sharing import ClauseBuffer, ClauseSharing
+
+# Options of the workers ... worker i > 0 uses CONFIGURATIONS[(i-1) % len(CONFIGURATIONS)]
+CONFIGURATIONS = [
+    {"restart": "luby"},
+    {"restart": "depth"},
+    {"restart": "glucose", "phase": "target"},
+    {"restart": "geometric", "rephaseInterval": 1000},
+    {"restart": "depth", "resetPoint": 50, "randomFreq": 0.02},
+    {"restart": "luby", "restartBase": 50, "phase": "occurrence"},
+    {"resets": False},
+    {"compact": True},
+    {"heuristics": False},
+]
+
+def shareClauses(clauses):
+    '''Flat shared arrays of literals and clause offsets ... not copied by workers.'''
+    start = [0]
+    for w in clauses:
+        start.append(start[-1] + len(w))
+    lits = RawArray("i", start[-1])
+    for i, w in enumerate(clauses):
+        lits[start[i]:start[i+1]] = w
+    return lits, RawArray("i", start)
+
+def sharedClauses(lits, start):
+    '''Clauses (lists of literals) of the shared arrays.'''
+    lits = lits[:]
+    return [lits[start[i]:start[i+1]] for i in range(len(start)-1)]
+
+def worker(i, options, numOfVars, lits, start, results, buffer=None, limits=None):
+    # Solve the shared CNF with options and put the result into results
+    options = dict(options)
+    resets = options.pop("resets", True)
+    resetPoint = options.pop("resetPoint", 100)
+    heuristics = options.pop("heuristics", True)
+    # Every worker breaks ties differently, also with a given seed
+    seed = options.pop("seed", 0) + i
+    clauses = sharedClauses(lits, start)
+    try:
+        if options.pop("compact", False):
+            from cdclarray import createInputArray, CDCLArray
+            sat = CDCLArray(*createInputArray(numOfVars, clauses), resets, resetPoint, heuristics)
+            x = sat.solve()
+            conflicts = sat.numOfClauses - sat.startNumOfClauses
+            model = [0] + [1 if l>0 else 0 for l in sat.getModel()] if x == SAT else None
+        else:
+            cnf, var = createInput(numOfVars, clauses)
+            sat = CDCL(cnf, var, resets, resetPoint, heuristics, seed=seed, **options)
+            if buffer is not None:
+                sat.sharing = ClauseSharing(buffer, i)
+            sat.budget = Budget(**limits) if limits else None
+            x = sat.solve()
+            conflicts = sat.conflicts
+            # Reason of an UNKNOWN result instead of a model
+            model = [0] + [v.val for v in sat.variables.values()] if x == SAT else sat.budget.reason if x == UNKNOWN else None
+    except Exception as e:
+        # Failed worker ... the others may still find the answer
+        results.put((i, None, repr(e), 0))
+        return
+    results.put((i, x, model, conflicts))
+
+def configuration(i, resets=True, resetPoint=100, heuristics=True, share=False, limited=False, options=None):
+    '''Options of worker i, the first one uses the given options, the others
+    their configuration on top of the given CDCL options.'''
+    options = options or {}
+    if i == 0:
+        return {"resets": resets or share, "resetPoint": resetPoint, "heuristics": heuristics, **options}
+    configurations = CONFIGURATIONS
+    if share:
+        # Clauses are imported at restarts of the CDCL engine
+        configurations = [o for o in configurations if o.get("resets", True) and not o.get("compact")]
+    if limited:
+        # The compact engine has no budget
+        configurations = [o for o in configurations if not o.get("compact")]
+    return {**options, **configurations[(i-1) % len(configurations)]}
+
+def solve(inFile, outFile, workers, resets=True, resetPoint=100, heuristics=True, conflicts=False, simplify=False, share=False, limits=None, **options):
+    numOfVars, clauses = readClauses(inFile)
+    if simplify:
+        # Simplify the CNF before solving
+        pre = Preprocessor(numOfVars, clauses)
+        clauses = pre.run()
+        print(f"Preprocessing removed {pre.removedClauses()} clauses and {pre.removedVariables()} variables in {round(pre.time, 2)}s.")
+        if clauses is None:
+            print(UNSAT)
+            writeModel(outFile, UNSAT, None)
+            return
+        # Eliminated and fixed variables are not decided
+        numOfVars, clauses = pre.renumber(clauses)
+    lits, start = shareClauses(clauses)
+    buffer = ClauseBuffer() if share else None
+    results = mp.Queue()
+    processes = []
+    configurations = [configuration(i, resets, resetPoint, heuristics, share, bool(limits), options) for i in range(workers)]
+    for i in range(workers):
+        p = mp.Process(target=worker, args=(i, configurations[i], numOfVars, lits, start, results, buffer, limits), daemon=True)
+        p.start()
+        processes.append(p)
+
+    # Wait for the first answer
+    x = None
+    reason = None # Why the last worker that ran out of its budget stopped
+    for _ in range(workers):
+        i, x, model, numOfConflicts = results.get()
+        if x == UNKNOWN:
+            reason = model
+        elif x is not None:
+            break
+        else:
+            print(f"Worker {i} failed: {model}")
+        x = None
+    for p in processes:
+        p.terminate()
+    for p in processes:
+        p.join()
+    if x is None:
+        if reason is None:
+            raise RuntimeError("All portfolio workers failed")
+        # Every worker ran out of its budget
+        x, model = UNKNOWN, None
+
+    if x != UNKNOWN:
+        print(f"Worker {i} ({', '.join(f'{k}={v}' for k, v in configurations[i].items()) or 'default'}) finished first.")
+    if conflicts:
+        print(f"{numOfConflicts} conflicts")
+    print(x)
+    if x == UNKNOWN:
+        print(f"Stopped by the {reason}.")
+    if simplify and x == SAT:
+        model = pre.extendModel(model)
+    writeModel(outFile, x, model)
@@ -0,0 +1,254 @@
+# Logic in computer science
+# Project: Implementing a SAT Solver
+# Preprocessing of a CNF before solving:
+#   - removal of duplicate literals, tautologies and duplicate clauses
+#   - unit propagation at level 0
+#   - subsumption and self-subsuming resolution
+#   - bounded variable elimination
+# Variables left in the simplified CNF are renumbered, so eliminated and fixed
+# variables are never decided. The model of the simplified CNF is extended to
+# a model of the original one.
+# Every change of the clauses can be written to a DRAT proof (see proof).
+
+from time import time
+
+class Preprocessor:
+    def __init__(self, numOfVars, clauses, occLimit=16, maxResolventSize=16, rounds=2, proof=None):
+        self.numOfVars = numOfVars
+        self.clauses = [] # Clauses as lists of literals, None if removed
+        self.occurs = {} # Indices of clauses containing each literal
+        self.values = [0] * (numOfVars+1) # Values fixed at level 0: 1 ... True, -1 ... False
+        self.units = [] # Fixed literals still to be propagated
+        self.elimStack = [] # (pivot literal, clause) of clauses removed by variable elimination
+        self.eliminated = bytearray(numOfVars+1) # Eliminated variables
+        self.occLimit = occLimit # Variables with more occurrences are not eliminated
+        self.maxResolventSize = maxResolventSize # Longer resolvents are not added
+        self.rounds = rounds # Number of rounds of subsumption and elimination
+        self.unsat = False
+        self.numOfClauses = len(clauses)
+        self.seenClauses = set() # Sorted clauses already added ... used to remove duplicates
+        self.time = 0
+        self.proof = proof # DRAT proof of the changes, None if not written
+        self.names = None # Original variable of every renumbered variable, None if not renumbered
+        for w in clauses:
+            self.addClause(w)
+        self.seenClauses = None
+
+    def getValue(self, l):
+        return self.values[l] if l>0 else -self.values[-l]
+
+    def addClause(self, w):
+        # Add clause w without duplicate and fixed literals
+        wNew = []
+        for l in w:
+            v = self.getValue(l)
+            if v == 1 or -l in wNew:
+                # Clause is satisfied or a tautology
+                return
+            elif v == 0 and l not in wNew:
+                wNew.append(l)
+        if len(wNew) == 0:
+            self.unsat = True
+        elif len(wNew) == 1:
+            self.fix(wNew[0])
+        else:
+            if self.seenClauses is not None:
+                key = tuple(sorted(wNew))
+                if key in self.seenClauses:
+                    # Duplicate clause
+                    return
+                self.seenClauses.add(key)
+            if self.proof is not None and wNew != w:
+                # Clause without fixed and duplicate literals replaces w
+                self.proof.add(wNew)
+                self.proof.delete(w)
+            i = len(self.clauses)
+            self.clauses.append(wNew)
+            for l in wNew:
+                self.occurs.setdefault(l, set()).add(i)
+
+    def removeClause(self, i):
+        if self.proof is not None:
+            self.proof.delete(self.clauses[i])
+        for l in self.clauses[i]:
+            self.occurs[l].discard(i)
+        self.clauses[i] = None
+
+    def strengthen(self, i, l):
+        # Remove literal l from clause i
+        w = self.clauses[i]
+        old = list(w) if self.proof is not None else None
+        w.remove(l)
+        self.occurs[l].discard(i)
+        if len(w) == 1:
+            # The unit is kept in values ... it is added to the proof by fix
+            self.occurs[w[0]].discard(i)
+            self.clauses[i] = None
+            self.fix(w[0])
+        elif old is not None:
+            self.proof.add(w)
+        if old is not None:
+            # The strengthened clause replaces the old one
+            self.proof.delete(old)
+
+    def fix(self, l):
+        # Fix literal l to True
+        v = self.getValue(l)
+        if self.proof is not None and v != 1:
+            self.proof.add([l])
+        if v == -1:
+            self.unsat = True
+        elif v == 0:
+            self.values[abs(l)] = 1 if l>0 else -1
+            self.units.append(l)
+
+    def propagateUnits(self):
+        # Remove satisfied clauses and False literals
+        while self.units and not self.unsat:
+            l = self.units.pop()
+            for i in list(self.occurs.get(l, ())):
+                self.removeClause(i)
+            for i in list(self.occurs.get(-l, ())):
+                if self.clauses[i] is not None:
+                    self.strengthen(i, -l)
+        return not self.unsat
+
+    def containing(self, lits):
+        '''Indices of clauses that contain every literal in lits.'''
+        occurs = self.occurs
+        sets = sorted((occurs.get(l, set()) for l in lits), key=len)
+        res = sets[0]
+        for other in sets[1:]:
+            if not res:
+                break
+            res = res & other
+        return set(res)
+
+    def subsume(self, indices):
+        # Remove clauses subsumed by clauses in indices and
+        # strengthen clauses with self-subsuming resolution
+        for i in sorted(indices, key=lambda i: len(self.clauses[i]) if self.clauses[i] else 0):
+            w = self.clauses[i]
+            if w is None:
+                continue
+            # Clauses subsumed by w contain every literal of w
+            for j in self.containing(w):
+                if j != i:
+                    self.removeClause(j)
+            # Self-subsuming resolution: if a clause contains w with l
+            # negated, -l can be removed from that clause
+            for k, l in enumerate(w):
+                for j in self.containing(w[:k] + [-l] + w[k+1:]):
+                    self.strengthen(j, -l)
+            if not self.propagateUnits():
+                return False
+        return True
+
+    def resolvents(self, x):
+        '''Non-tautological resolvents on x, None if there are too many.'''
+        pos = [self.clauses[i] for i in self.occurs.get(x, ())]
+        neg = [self.clauses[i] for i in self.occurs.get(-x, ())]
+        limit = len(pos) + len(neg)
+        res = []
+        for p in pos:
+            for n in neg:
+                r = [l for l in p if l != x]
+                for l in n:
+                    if l == -x or l in r:
+                        continue
+                    elif -l in r:
+                        break
+                    r.append(l)
+                else:
+                    if len(r) > self.maxResolventSize:
+                        return None
+                    res.append(r)
+                    if len(res) > limit:
+                        return None
+        return res
+
+    def eliminate(self):
+        # Bounded variable elimination ... eliminate x if the
+        # resolvents on x are not more than the clauses containing x
+        occurs = self.occurs
+        candidates = [x for x in range(1, self.numOfVars+1)
+                      if self.values[x] == 0 and not self.eliminated[x]
+                      and len(occurs.get(x, ())) + len(occurs.get(-x, ())) <= self.occLimit]
+        candidates.sort(key=lambda x: len(occurs.get(x, ())) * len(occurs.get(-x, ())))
+        added = []
+        for x in candidates:
+            if self.values[x] != 0 or len(occurs.get(x, ())) + len(occurs.get(-x, ())) > self.occLimit:
+                continue
+            res = self.resolvents(x)
+            if res is None:
+                continue
+            self.eliminated[x] = 1
+            if self.proof is not None:
+                # Resolvents are added before the clauses they are derived from are deleted
+                for r in res:
+                    self.proof.add(r)
+            for l in (x, -x):
+                for i in list(occurs.get(l, ())):
+                    self.elimStack.append((l, self.clauses[i]))
+                    self.removeClause(i)
+            for r in res:
+                i = len(self.clauses)
+                self.addClause(r)
+                if len(self.clauses) > i:
+                    added.append(i)
+            if not self.propagateUnits():
+                return None
+        return [i for i in added if self.clauses[i] is not None]
+
+    def run(self):
+        '''Simplified clauses, None if the CNF is unsatisfiable.'''
+        t = time()
+        if not self.unsat and self.propagateUnits() and self.subsume(range(len(self.clauses))):
+            for _ in range(self.rounds):
+                added = self.eliminate()
+                if added is None or not self.subsume(added):
+                    self.unsat = True
+                    break
+                if not added:
+                    break
+        self.time = time() - t
+        if self.unsat:
+            return None
+        return [w for w in self.clauses if w is not None]
+
+    def renumber(self, clauses):
+        '''Number of variables and clauses of the simplified CNF with its variables numbered 1, 2, ...'''
+        self.names = [0] + sorted({abs(l) for w in clauses for l in w})
+        number = {x: i for i, x in enumerate(self.names)}
+        clauses = [[number[l] if l>0 else -number[-l] for l in w] for w in clauses]
+        if self.proof is not None:
+            # Later clauses of the proof use the new numbers
+            self.proof.rename(self.names)
+        return len(self.names)-1, clauses
+
+    def removedVariables(self):
+        return sum(1 for x in range(1, self.numOfVars+1) if self.values[x] != 0 or self.eliminated[x])
+
+    def removedClauses(self):
+        return self.numOfClauses - sum(1 for w in self.clauses if w is not None)
+
+    def extendModel(self, model):
+        '''Extend model (list of values 1/0 indexed by variable) of the simplified CNF.'''
+        if self.names is not None:
+            # Back to the original numbers ... variables in no clause are False
+            renumbered = model
+            model = [0] * (self.numOfVars+1)
+            for i in range(1, len(self.names)):
+                model[self.names[i]] = renumbered[i]
+        for x in range(1, self.numOfVars+1):
+            if self.values[x] != 0:
+                model[x] = 1 if self.values[x] == 1 else 0
+        # Eliminated variables in reverse order ... if a removed
+        # clause is not satisfied, its pivot literal must be True
+        for l, w in reversed(self.elimStack):
+            for k in w:
+                if model[abs(k)] == (1 if k>0 else 0):
+                    break
+            else:
+                model[abs(l)] = 1 if l>0 else 0
+        return model
@@ -0,0 +1,78 @@
+# Logic in computer science
+# Project: Implementing a SAT Solver
+# Proofs of unsatisfiability in DRAT format:
+#   - every added (learned, strengthened, resolved) clause and every
+#     deleted clause is written, ending with the empty clause
+#   - binary format by default, text format optionally
+#   - writes are collected in a buffer and written in large blocks
+# Proofs can be checked with drat-trim: drat-trim <cnf> <proof>
+
+class Proof:
+    def __init__(self, outFile, binary=True, bufferSize=1<<16):
+        self.f = open(outFile, "wb")
+        self.binary = binary # Binary or text DRAT
+        self.buffer = bytearray()
+        self.bufferSize = bufferSize # The buffer is written when it is larger
+        self.codes = {} # Encodings of literals that were already written
+        self.names = None # Original variable of every variable, None if variables are not renumbered
+        self.added = 0 # Number of added clauses
+        self.deleted = 0 # Number of deleted clauses
+
+    def encode(self, l):
+        '''Encoding of literal l in the proof.'''
+        k = l
+        if self.names is not None:
+            # Renumbered variable ... written with its original number
+            l = self.names[l] if l>0 else -self.names[-l]
+        if self.binary:
+            # 2*x for x, 2*x+1 for -x, 7 bits per byte and the highest bit
+            # set in every byte but the last one
+            u = 2*l if l>0 else -2*l+1
+            code = bytearray()
+            while u > 127:
+                code.append(u & 127 | 128)
+                u >>= 7
+            code.append(u)
+            code = bytes(code)
+        else:
+            code = f"{l} ".encode()
+        self.codes[k] = code
+        return code
+
+    def rename(self, names):
+        '''Later clauses use renumbered variables, names[x] is the original variable of x.'''
+        self.names = names
+        self.codes = {}
+
+    def write(self, tag, w):
+        # Write clause w after tag ('a' or 'd')
+        buffer = self.buffer
+        codes = self.codes
+        if self.binary:
+            buffer += tag
+        elif tag == b"d":
+            buffer += b"d "
+        for l in w:
+            code = codes.get(l)
+            buffer += code if code is not None else self.encode(l)
+        buffer += b"\0" if self.binary else b"0\n"
+        if len(buffer) > self.bufferSize:
+            self.flush()
+
+    def add(self, w):
+        '''Add clause w (list of literals), the empty clause ends a proof.'''
+        self.added += 1
+        self.write(b"a", w)
+
+    def delete(self, w):
+        '''Delete clause w.'''
+        self.deleted += 1
+        self.write(b"d", w)
+
+    def flush(self):
+        self.f.write(self.buffer)
+        self.buffer.clear()
+
+    def close(self):
+        self.flush()
+        self.f.close()
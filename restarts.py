@@ -0,0 +1,113 @@
+# Logic in computer science
+# Project: Implementing a SAT Solver
+# Restart policies for CDCL:
+#   - depth ... restart when the decision level passes resetPoint
+#     or after unit*luby(i) conflicts, if the search never gets that deep
+#   - luby ... restart after unit*luby(i) conflicts
+#   - geometric ... restart after first*factor^i conflicts
+#   - glucose ... restart when recent learned clauses are worse than average
+
+from collections import deque
+
+def luby(y, x):
+    '''x-th element (starting with 0) of the Luby sequence with base y.'''
+    size, seq = 1, 0
+    while size < x+1:
+        seq += 1
+        size = 2*size + 1
+    while size-1 != x:
+        size = (size-1) >> 1
+        seq -= 1
+        x = x % size
+    return y**seq
+
+class DepthRestart:
+    def __init__(self, resetPoint=100, factor=1.1, unit=200):
+        self.resetPoint = resetPoint # Depth needed to restart
+        self.factor = factor # resetPoint is multiplied by factor on every restart
+        # Conflicts also restart the search ... without them VSIDS can stay
+        # in a bad part of the search space when the trail never gets deep
+        self.luby = LubyRestart(unit)
+
+    def onConflict(self, lbd):
+        self.luby.onConflict(lbd)
+
+    def shouldRestart(self, dl):
+        return dl > self.resetPoint or self.luby.shouldRestart(dl)
+
+    def onRestart(self):
+        if self.luby.shouldRestart(0):
+            self.luby.onRestart()
+        else:
+            self.resetPoint *= self.factor
+
+class LubyRestart:
+    def __init__(self, unit=100):
+        self.unit = unit # Conflicts in the shortest run
+        self.restarts = 0
+        self.conflicts = 0 # Conflicts since the last restart
+        self.limit = unit * luby(2, 0)
+
+    def onConflict(self, lbd):
+        self.conflicts += 1
+
+    def shouldRestart(self, dl):
+        return self.conflicts >= self.limit
+
+    def onRestart(self):
+        self.restarts += 1
+        self.conflicts = 0
+        self.limit = self.unit * luby(2, self.restarts)
+
+class GeometricRestart:
+    def __init__(self, first=100, factor=1.5):
+        self.limit = first # Conflicts before the next restart
+        self.factor = factor
+        self.conflicts = 0 # Conflicts since the last restart
+
+    def onConflict(self, lbd):
+        self.conflicts += 1
+
+    def shouldRestart(self, dl):
+        return self.conflicts >= self.limit
+
+    def onRestart(self):
+        self.conflicts = 0
+        self.limit *= self.factor
+
+class GlucoseRestart:
+    def __init__(self, window=50, K=0.8):
+        self.recent = deque(maxlen=window) # LBD of the last window learned clauses
+        self.recentSum = 0
+        self.K = K # Restart if K * recent average > total average
+        self.lbdSum = 0
+        self.conflicts = 0
+
+    def onConflict(self, lbd):
+        if len(self.recent) == self.recent.maxlen:
+            self.recentSum -= self.recent[0]
+        self.recent.append(lbd)
+        self.recentSum += lbd
+        self.lbdSum += lbd
+        self.conflicts += 1
+
+    def shouldRestart(self, dl):
+        return len(self.recent) == self.recent.maxlen and \
+            self.recentSum * self.K / len(self.recent) > self.lbdSum / self.conflicts
+
+    def onRestart(self):
+        self.recent.clear()
+        self.recentSum = 0
+
+def createRestart(policy="depth", resetPoint=100, restartBase=None):
+    '''Create a restart policy by its name.'''
+    if policy == "depth":
+        return DepthRestart(resetPoint, unit=restartBase or 200)
+    elif policy == "luby":
+        return LubyRestart(restartBase or 100)
+    elif policy == "geometric":
+        return GeometricRestart(restartBase or 100)
+    elif policy == "glucose":
+        return GlucoseRestart(restartBase or 50)
+    else:
+        raise ValueError(f"Unknown restart policy '{policy}'")
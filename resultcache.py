@@ -0,0 +1,72 @@
+# Logic in computer science
+# Project: Implementing a SAT Solver
+# Cache of results:
+#   - CNFs are identified by a hash of their canonical form ... clauses
+#     with sorted literals, without duplicates, in sorted order, so the
+#     order of clauses and literals and comments do not matter
+#   - models of satisfiable CNFs and unsatisfiable results are stored,
+#     one file per CNF
+#   - every cached model is checked against the CNF before it is used
+#   - least recently used results are deleted when the cache gets too big
+
+import os
+import hashlib
+import cachefiles
+from output import SAT, UNSAT, checkModel
+
+def canonicalHash(numOfVars, lits, start):
+    '''Hash of a CNF (literals of all clauses and clause offsets) that does not
+    depend on the order of clauses and literals.'''
+    lits = lits.tolist()
+    start = start.tolist()
+    clauses = {tuple(sorted(set(lits[s:e]))) for s, e in zip(start, start[1:])}
+    # repr of the sorted clauses is built in C, much faster than writing them one by one
+    return hashlib.sha256(repr((numOfVars, sorted(clauses))).encode()).hexdigest()
+
+class ResultCache:
+    def __init__(self, directory, maxSize=64<<20):
+        self.directory = directory
+        self.maxSize = maxSize # Bytes of all cached results
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".result")
+
+    def get(self, key, numOfVars, lits, start):
+        '''Result and model (list of 1/0 indexed by variable) of the CNF with hash key,
+        None if it is not cached or the cached result is damaged or does not fit the CNF.'''
+        path = self.path(key)
+        try:
+            with open(path) as f:
+                x, _, values = f.read().partition("\n")
+        except (OSError, UnicodeDecodeError):
+            self.misses += 1
+            return None
+        model = None
+        if x == SAT and len(values) == numOfVars and not values.strip("01"):
+            model = [0] + [1 if v == "1" else 0 for v in values]
+            if not checkModel(lits, start, model):
+                x = None
+        elif x != UNSAT or values:
+            # Truncated or damaged file
+            x = None
+        if x is None:
+            # Damaged or not the same CNF ... never used again
+            cachefiles.remove(path)
+            self.misses += 1
+            return None
+        cachefiles.touch(path)
+        self.hits += 1
+        return x, model
+
+    def put(self, key, x, model):
+        '''Store the result x and model (list of 1/0 indexed by variable) of the CNF with hash key.'''
+        if x not in (SAT, UNSAT):
+            return
+        def write(path):
+            with cachefiles.atomicWrite(path) as f:
+                f.write(x + "\n")
+                if x == SAT:
+                    f.write("".join("1" if v == 1 else "0" for v in model[1:]))
+        cachefiles.store(self.path(key), write, self.maxSize)
@@ -0,0 +1,222 @@
+# Logic in computer science
+# Project: Implementing a SAT Solver
+# Local solver server:
+#   - HTTP on localhost or on a Unix socket
+#   - POST /solve with a CNF in DIMACS or the binary format (see dimacs)
+#     as the body, optionally gzip compressed, GET /status for counters
+#   - a pool of warm CDCL worker processes solves the CNFs, so requests
+#     pay neither the startup of the interpreter nor the imports
+#   - every request has a time limit that includes the time spent waiting
+#     for a worker (see budget), the answer is UNKNOWN when it runs out
+#   - admission control ... at most queueSize requests wait for a worker,
+#     further requests are rejected at once with 503
+# Example: curl --data-binary @Examples/sudoku/s1/sat.txt "localhost:8765/solve?timeLimit=1"
+
+import os
+import sys
+import json
+import gzip
+import zlib
+import threading
+import multiprocessing as mp
+from time import time
+from getopt import getopt
+from urllib.parse import urlparse, parse_qs
+from socketserver import ThreadingMixIn, UnixStreamServer
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import dimacs
+from budget import Budget
+from cdcl import SAT, createInput, CDCL
+from output import UNKNOWN
+
+ERROR = "ERROR" # CNF could not be read or solved
+
+def solveData(data, received, timeLimit, conflictLimit=None):
+    '''Dictionary with the result of a CNF received at time received.'''
+    t = time()
+    # Time spent waiting for a worker counts towards the time limit
+    remaining = timeLimit - (t - received)
+    result = {"wait": round(t - received, 4)}
+    if remaining <= 0:
+        result.update(result=UNKNOWN, reason="time limit", time=0)
+        return result
+    try:
+        numOfVars, lits, start = dimacs.readData(data)
+        cnf, var = createInput(numOfVars, dimacs.toClauses(lits, start))
+    except Exception as e:
+        result.update(result=ERROR, error=repr(e))
+        return result
+    # Parsing also counts towards the time limit
+    remaining = timeLimit - (time() - received)
+    if remaining <= 0:
+        result.update(result=UNKNOWN, reason="time limit", time=round(time()-t, 4))
+        return result
+    sat = CDCL(cnf, var, heuristics=True)
+    sat.budget = Budget(timeLimit=remaining, conflictLimit=conflictLimit)
+    x = sat.solve()
+    result.update(result=x, conflicts=sat.conflicts, time=round(time()-t, 4))
+    if x == SAT:
+        result["model"] = sat.getModel()
+    elif x == UNKNOWN:
+        result["reason"] = sat.budget.reason
+    return result
+
+class Solver:
+    def __init__(self, workers=None, queueSize=None, timeLimit=10, maxBytes=64<<20):
+        self.workers = workers or os.cpu_count()
+        self.queueSize = self.workers if queueSize is None else queueSize # Requests waiting for a worker
+        self.timeLimit = timeLimit # Default and largest time limit of a request
+        self.maxBytes = maxBytes # Largest accepted CNF
+        self.pool = mp.Pool(self.workers)
+        # Every accepted request holds a slot until it is answered
+        self.slots = threading.BoundedSemaphore(self.workers + self.queueSize)
+        self.lock = threading.Lock()
+        self.active = 0 # Requests being solved or waiting for a worker
+        self.served = 0 # Answered requests
+        self.rejected = 0 # Requests rejected because the queue was full
+
+    def solve(self, data, timeLimit=None, conflictLimit=None, received=None):
+        '''Result of a CNF received at time received (now if None) as a dictionary,
+        None if the request was rejected.'''
+        received = time() if received is None else received
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.rejected += 1
+            return None
+        with self.lock:
+            self.active += 1
+        try:
+            timeLimit = self.timeLimit if timeLimit is None else min(timeLimit, self.timeLimit)
+            return self.pool.apply_async(solveData, (data, received, timeLimit, conflictLimit)).get()
+        finally:
+            with self.lock:
+                self.active -= 1
+                self.served += 1
+            self.slots.release()
+
+    def status(self):
+        with self.lock:
+            return {"workers": self.workers, "queueSize": self.queueSize, "timeLimit": self.timeLimit,
+                    "running": min(self.active, self.workers), "waiting": max(0, self.active - self.workers),
+                    "served": self.served, "rejected": self.rejected}
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Connections are kept alive between requests
+
+    def reply(self, code, body, headers=()):
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in headers:
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if urlparse(self.path).path == "/status":
+            self.reply(200, self.server.solver.status())
+        else:
+            self.reply(404, {"error": "Not found"})
+
+    def do_POST(self):
+        # Reading and decompressing the CNF count towards the time limit
+        received = time()
+        solver = self.server.solver
+        url = urlparse(self.path)
+        if url.path != "/solve":
+            self.reply(404, {"error": "Not found"})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        if length > solver.maxBytes:
+            self.close_connection = True
+            self.reply(413, {"error": f"CNF is larger than {solver.maxBytes} bytes"})
+            return
+        data = self.rfile.read(length)
+        try:
+            if self.headers.get("Content-Encoding") == "gzip":
+                data = gzip.decompress(data)
+            query = parse_qs(url.query)
+            timeLimit = float(query["timeLimit"][0]) if "timeLimit" in query else None
+            conflictLimit = int(query["conflictLimit"][0]) if "conflictLimit" in query else None
+        except (ValueError, OSError, zlib.error, EOFError) as e:
+            # Also a corrupt or truncated gzip body
+            self.reply(400, {"error": repr(e)})
+            return
+        result = solver.solve(data, timeLimit, conflictLimit, received)
+        if result is None:
+            self.reply(503, {"error": "Too many requests"}, [("Retry-After", "1")])
+        else:
+            self.reply(400 if result["result"] == ERROR else 200, result)
+
+    def log_message(self, format, *args):
+        # Requests are not logged ... there may be many every second
+        pass
+
+class UnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        # Clients of a Unix socket have no address, but the handler expects one
+        request, _ = super().get_request()
+        return request, ("local", 0)
+
+def serve(solver, host="127.0.0.1", port=8765, socketPath=None):
+    '''Answer requests with solver until interrupted.'''
+    if socketPath is not None:
+        if os.path.exists(socketPath):
+            # Socket of a previous server
+            os.remove(socketPath)
+        httpd = UnixHTTPServer(socketPath, Handler)
+        address = socketPath
+    else:
+        httpd = ThreadingHTTPServer((host, port), Handler)
+        address = f"http://{host}:{httpd.server_address[1]}"
+    httpd.solver = solver
+    print(f"Serving on {address} with {solver.workers} workers and a queue of {solver.queueSize} requests.", flush=True)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        solver.close()
+        if socketPath is not None and os.path.exists(socketPath):
+            os.remove(socketPath)
+
+def main():
+    # python server.py [options]
+    options, _ = getopt(sys.argv[1:], "", ["host=", "port=", "socket=", "workers=", "queue=", "timeLimit=", "noCache"])
+
+    # Default values
+    host = "127.0.0.1" # Only local clients
+    port = 8765
+    socketPath = None # Unix socket instead of TCP
+    workers = None # Number of worker processes, None means one per core
+    queueSize = None # Requests waiting for a worker, None means as many as workers
+    timeLimit = 10 # Default and largest time limit of a request in seconds
+
+    for o,v in options:
+        if o == "--host":
+            host = v
+        elif o == "--port":
+            port = int(v)
+        elif o == "--socket":
+            socketPath = v
+        elif o == "--workers":
+            workers = int(v)
+        elif o == "--queue":
+            queueSize = int(v)
+        elif o == "--timeLimit":
+            timeLimit = float(v)
+        elif o == "--noCache":
+            dimacs.cacheDir = None
+
+    serve(Solver(workers, queueSize, timeLimit), host, port, socketPath)
+
+if __name__ == "__main__":
+    main()
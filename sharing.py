@@ -0,0 +1,71 @@
+# Logic in computer science
+# Project: Implementing a SAT Solver
+# Sharing of learned clauses between CDCL workers:
+#   - clauses live in a ring buffer in shared memory
+#   - workers export short learned clauses (low LBD or size)
+#   - workers import clauses of the others at restarts
+
+import multiprocessing as mp
+from multiprocessing.sharedctypes import RawArray, RawValue
+
+class ClauseBuffer:
+    def __init__(self, size=1<<20):
+        # Records [worker, size, literals...] written one after another
+        self.data = RawArray("i", size)
+        self.size = size
+        self.head = RawValue("q", 0) # Number of integers ever written
+        self.lock = mp.Lock()
+
+    def write(self, worker, clauses):
+        # Append clauses of worker to the buffer
+        data, size = self.data, self.size
+        with self.lock:
+            head = self.head.value
+            for w in clauses:
+                for v in [worker, len(w)] + w:
+                    data[head % size] = v
+                    head += 1
+            self.head.value = head
+
+    def read(self, worker, pos):
+        '''Clauses of other workers written since pos and the new position.'''
+        data, size = self.data, self.size
+        clauses = []
+        with self.lock:
+            head = self.head.value
+            if head - pos > size:
+                # Older records were overwritten ... skip them
+                return clauses, head
+            while pos < head:
+                sender = data[pos % size]
+                n = data[(pos+1) % size]
+                if sender != worker:
+                    clauses.append([data[k % size] for k in range(pos+2, pos+2+n)])
+                pos += n+2
+        return clauses, pos
+
+class ClauseSharing:
+    def __init__(self, buffer, worker, maxLbd=2, maxSize=8):
+        self.buffer = buffer
+        self.worker = worker # Index of this worker
+        self.maxLbd = maxLbd # Clauses with lbd <= maxLbd are exported
+        self.maxSize = maxSize # Clauses with at most maxSize literals are exported
+        self.pos = buffer.head.value # Position of the next record to import
+        self.outgoing = [] # Clauses not yet written to the buffer
+        self.exported = 0
+        self.imported = 0
+
+    def export(self, wL, lbd):
+        # Remember a learned clause if it is worth sharing
+        if lbd <= self.maxLbd or len(wL) <= self.maxSize:
+            self.outgoing.append(list(wL))
+
+    def exchange(self):
+        '''Write exported clauses and return clauses of the other workers.'''
+        if self.outgoing:
+            self.buffer.write(self.worker, self.outgoing)
+            self.exported += len(self.outgoing)
+            self.outgoing = []
+        clauses, self.pos = self.buffer.read(self.worker, self.pos)
+        self.imported += len(clauses)
+        return clauses
@@ -0,0 +1,60 @@
+# Logic in computer science
+# Project: Implementing a SAT Solver
+# Statistics of the CDCL algorithm:
+#   - counters are plain attributes of CDCL, they are only read when
+#     statistics are reported, so collecting them costs next to nothing
+#   - time spent in every phase (parse, initial propagation, search, output)
+#   - progress lines every few conflicts during the search
+#   - all statistics can be exported as JSON at the end
+
+import json
+from time import time
+
+class Stats:
+    def __init__(self, interval=0):
+        self.interval = interval # Conflicts between two progress lines, 0 means no progress lines
+        self.times = {} # Seconds spent in every phase
+        self.start = time()
+
+    def addTime(self, phase, t):
+        self.times[phase] = self.times.get(phase, 0) + t
+
+    def collect(self, sat):
+        '''Dictionary of statistics of CDCL sat.'''
+        learned = sat.learnedClauses
+        return {
+            "variables": len(sat.variables),
+            "decisions": sat.decisions,
+            "propagations": sat.propagations,
+            "conflicts": sat.conflicts,
+            "restarts": sat.restarts,
+            "rephases": sat.rephases,
+            "learnedClauses": learned,
+            "deletedClauses": sat.deletedClauses,
+            "averageLearnedLength": round(sat.learnedLiterals / learned, 2) if learned else 0,
+            "averageLbd": round(sat.learnedLbd / learned, 2) if learned else 0,
+            "times": {phase: round(t, 4) for phase, t in self.times.items()},
+        }
+
+    def progress(self, sat):
+        # Print a line with the statistics so far
+        t = time() - self.start
+        learned = sat.learnedClauses
+        print(f"{round(t, 1)}s: {sat.conflicts} conflicts, {sat.decisions} decisions, "
+              f"{round(sat.propagations/t) if t > 0 else 0} propagations/s, {sat.restarts} restarts, "
+              f"{len(sat.learnts)} learned clauses kept ({round(sat.learnedLbd/learned, 1) if learned else 0} average lbd), "
+              f"{sat.solved} variables set")
+
+    def write(self, sat, outFile):
+        # Export all statistics as JSON
+        with open(outFile, "w") as f:
+            json.dump(self.collect(sat), f, indent=1)
+
+    def writeCached(self, numOfVars, outFile):
+        # Export statistics of a result found in the result cache ... nothing was searched
+        stats = {"variables": numOfVars, "cached": True}
+        for k in ("decisions", "propagations", "conflicts", "restarts", "rephases", "learnedClauses", "deletedClauses"):
+            stats[k] = 0
+        stats["times"] = {phase: round(t, 4) for phase, t in self.times.items()}
+        with open(outFile, "w") as f:
+            json.dump(stats, f, indent=1)